@@ -85,11 +85,12 @@ def log_transformation_function(df, column_name):
 
 def fix_anomalies(data, col, threshold_percentage=0.3):
     # If same column value is marked according to a distinct responsible both 1 and -1 than unset all anomalies
-    data['anomaly'] = data[col].replace(data.groupby(col)['anomaly'].max().to_dict())
+    data['anomaly'] = data[col].replace(data.groupby(col, observed=True)['anomaly'].max().to_dict())
 
     # same if there is more than 30% of responsible that have that anomaly, set it to one
     # Get all responsible that been marked anomalus for a specific value
-    grouped_df = data[data['anomaly'] == -1].groupby(col)['responsible'].nunique().reset_index(name='count')
+    grouped_df = data[data['anomaly'] == -1].groupby(col, observed=True)['responsible'].nunique().reset_index(
+        name='count')
     # Compute the percentage
     grouped_df['anomaly_percentage'] = grouped_df['count'] / data['responsible'].nunique()
     update_anomalies_list = grouped_df[grouped_df['anomaly_percentage'] >= threshold_percentage][col].values
@@ -136,7 +137,7 @@ def find_anomalies(df, index_col=['interview__id', 'roster_level', 'responsible'
             df[col + '_anomaly'] = df['index_col'].map(data.set_index('index_col')['anomaly'])
     df.drop(columns=['index_col'], inplace=True)
     columns = df.drop(columns=index_col).columns
-    df = df.groupby('interview__id')[columns].sum()
+    df = df.groupby('interview__id', observed=True)[columns].sum()
     df = df.reset_index()
     return df
 
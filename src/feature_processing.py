@@ -1,24 +1,54 @@
 from src.import_manager import *
+from src.utils.scheduler_utils import *
+from src.utils.event_utils import *
+
+# Native dtypes of the questionnaire attributes joined to the paradata, nullable as not every event relates to a question
+PARADATA_ATTRIBUTE_DTYPES = {'qnr_seq': 'Int64', 'question_scope': 'Int64', 'question_sequence': 'Int64',
+                             'yes_no_view': 'boolean'}
+# Columns of the imported frames used by the features, the others, e.g. the JSON-encoded answers and children of the
+# questionnaire, are not read from the processed data
+DATASET_COLUMNS = {
+    'paradata': ['interview__id', 'order', 'event', 'responsible', 'role', 'tz_offset', 'param', 'answer',
+                 'roster_level', 'timestamp_local', 'survey_name', 'survey_version', 'qnr_seq'],
+    'questionnaire': QUESTIONNAIRE_KEY + ['variable_name', 'type', 'question_type', 'question_scope', 'yes_no_view',
+                                          'question_sequence', 'is_integer', 'n_answers', 'answer_sequence',
+                                          'cascade_from_question_id', 'is_filtered_combobox'],
+    'microdata': ['interview__id', 'roster_level', 'value', 'value_numeric', 'survey_name', 'survey_version',
+                  'qnr_seq'],
+}
 
 
 class FeatureProcessing(ImportManager):
 
     def __init__(self, config):
+        # Feature and score methods, run in the order of the columns they read and write. Built first, as the
+        # microdata imported depend on all the methods the enabled features need
+        self.feature_graph = FeatureGraph(get_feature_nodes(type(self)))
         super().__init__(config)
 
         self.extract()
-        paradata, questionaire, microdata = self.get_dataframes(reload=self.config['environment']['reload'],
-                                                                save_to_disk=self.config['environment']['save_to_disk'])
+        # The imported frames are shared by the accessors below, so that the export files are imported once
+        self.dataset = Dataset(self, reload=self.config['environment']['reload'],
+                               save_to_disk=self.config['environment']['save_to_disk'],
+                               columns=DATASET_COLUMNS).load()
         print('Data Loaded')
         self._allowed_features = ['f__' + k for k, v in config['features'].items() if v['use']]
         self.item_level_columns = ['interview__id', 'variable_name', 'roster_level']
-        self._df_paradata = self.process_paradata(paradata)
+        self._item_index = None
+        self._df_time = None
+        self._df_active_paradata = None
+        # Scan the events with the numba compiled kernels if numba is installed, else with NumPy
+        self.use_numba = self.config['environment'].get('numba_kernels', True)
+        self.df_paradata = self.process_paradata(self.dataset.paradata)
         print('Paradata Processed')
-        self._df_item = self.make_df_item(microdata)
+        self._df_item = self.make_df_item(self.dataset.microdata)
         print('Items Build')
         self._df_unit = self.make_df_unit()
         print('Unit Build')
         self._df_resp = self.make_df_responsible()
+        # The features are computed on the processed frames, release the imported ones
+        if self.config['environment'].get('evict_imported_data', False):
+            self.dataset.evict(['paradata', 'microdata'])
         # Define ask that get recurrently used
         self.numeric_question_mask = (
                 (self._df_item['type'] == 'NumericQuestion') &
@@ -26,6 +56,10 @@ class FeatureProcessing(ImportManager):
                 (~pd.isnull(self._df_item['value'])) &
                 (self._df_item['value'] != -999999999)
         )
+        # The parsed numeric answers are only kept for the numeric questions, instead of a float column next to
+        # the string value, which the other features and the scores read
+        self.numeric_values = self._df_item.loc[self.numeric_question_mask, 'value_numeric']
+        self._df_item.drop(columns='value_numeric', inplace=True)
 
     @staticmethod
     def rename_feature(feature_name, starting_string='f', new_string='s'):
@@ -35,41 +69,71 @@ class FeatureProcessing(ImportManager):
             if feature_name.startswith(starting_string) else feature_name
         return new_variable_name
 
+    def get_required_features(self):
+        # The enabled features and the features of the methods they depend on, e.g. f__number_answered for
+        # s__pause_count, which are computed even if disabled
+        features = super().get_required_features()
+        targets = [name for name, node in self.feature_graph.nodes.items() if node['feature'][3:] in features]
+        required = {self.feature_graph.nodes[name]['feature'][3:] for name in self.feature_graph.get_required(targets)}
+        return features + sorted(required - set(features))
+
     @property
     def df_item(self):
-        for method_name in self.get_make_methods(method_type='feature', level='item'):
-            feature_name = method_name.replace('make_feature_item', 'f')
-            if feature_name in self._allowed_features and feature_name not in self._df_item.columns:
-                try:
-                    print(f"Processing {feature_name}...")
-                    getattr(self, method_name)(feature_name)
-                    # print(f"{feature_name} Processed")
-                except Exception as e:
-                    print("WARNING: FEATURE ITEM: {} won't be used in further calculation".format(feature_name))
+        self.run_feature_graph('item')
         return self._df_item
 
     @property
     def df_unit(self):
-        for method_name in self.get_make_methods(method_type='feature', level='unit'):
-            feature_name = method_name.replace('make_feature_unit', 'f')
-            if feature_name in self._allowed_features and feature_name not in self._df_unit.columns:
-                try:
-                    print(f"Processing {feature_name} ...")
-                    getattr(self, method_name)(feature_name)
-                except Exception as e:
-                    print("WARNING: FEATURE UNIT: {}, It won't be used in further calculation".format(feature_name))
+        self.run_feature_graph('unit')
         return self._df_unit
 
+    def run_feature_graph(self, kind, prepare_node=None):
+        # Run the enabled methods of a kind ('item', 'unit' or 'score'), and the methods they depend on
+        targets = [name for name, node in self.feature_graph.nodes.items()
+                   if node['kind'] == kind and node['feature'] in self._allowed_features]
+        self.feature_graph.run(targets, self.run_feature_node,
+                               workers=self.config['environment'].get('feature_workers', 1),
+                               prepare_node=prepare_node)
+
+    def run_feature_node(self, method_name):
+        node = self.feature_graph.nodes[method_name]
+        feature_name = node['feature']
+        if node['kind'] == 'item' and feature_name not in self._df_item.columns:
+            try:
+                print(f"Processing {feature_name}...")
+                getattr(self, method_name)(feature_name)
+            except Exception as e:
+                print("WARNING: FEATURE ITEM: {} won't be used in further calculation".format(feature_name))
+        elif node['kind'] == 'unit' and feature_name not in self._df_unit.columns:
+            try:
+                print(f"Processing {feature_name} ...")
+                getattr(self, method_name)(feature_name)
+            except Exception as e:
+                print("WARNING: FEATURE UNIT: {}, It won't be used in further calculation".format(feature_name))
+        elif node['kind'] == 'score':
+            score_name = self.rename_feature(feature_name)
+            try:
+                print('Processing Score {}...'.format(score_name))
+                getattr(self, method_name)(feature_name)
+            except Exception as e:
+                print("WARNING: SCORE: {} won't be used in further calculation".format(score_name))
+
     @property
     def df_active_paradata(self):
-        # df_para_active, active events, prior rejection/review events, for questions with scope interviewer
+        # df_para_active, active events, prior rejection/review events, for questions with scope interviewer.
+        # It is built once and cached until df_paradata is set, the consumers must not modify it
+        if self._df_active_paradata is None:
+            self._df_active_paradata = self.make_df_active_paradata()
+        return self._df_active_paradata
+
+    def make_df_active_paradata(self):
 
         active_events = ['InterviewCreated', 'AnswerSet', 'Resumed', 'AnswerRemoved', 'CommentSet', 'Restarted']
         # only keep events done by interview (in most cases this should be all, after above filters,
         # just in case supervisor or HQ answered something while interviewer answered on web mode)
         # keep active events, prior rejection/review events, for questions with scope interviewer
         active_mask = (self.df_paradata['event'].isin(active_events)) & \
-                      (self.df_paradata['question_scope'].isin([0, ''])) & \
+                      (self.df_paradata['question_scope'].fillna(0) == 0) & \
                       (self.df_paradata['role'] == 1)
 
         vars_needed = ['interview__id', 'order', 'event', 'responsible', 'role', 'tz_offset',
@@ -85,40 +149,52 @@ class FeatureProcessing(ImportManager):
     def df_paradata(self):
         return self._df_paradata
 
+    @df_paradata.setter
+    def df_paradata(self, df_paradata):
+        # the frames derived from the paradata are built again from the new paradata
+        self._df_paradata = df_paradata
+        self._df_active_paradata = None
+        self.invalidate_df_time()
+
     @property
     def df_microdata(self):
-        paradata, questionaire, microdata = self.get_dataframes(reload=self.config['environment']['reload'],
-                                                                save_to_disk=self.config['environment']['save_to_disk'])
-        return microdata
+        return self.dataset.microdata
 
     @property
     def df_questionaire(self):
-        paradata, questionaire, microdata = self.get_dataframes(reload=self.config['environment']['reload'],
-                                                                save_to_disk=self.config['environment']['save_to_disk'])
-        return questionaire
-
-    def make_index_col(self, df):
-
-        # Filter out columns with NaN and empty strings
-        mask = (~df[['interview__id', 'variable_name', 'roster_level']].isnull()) & \
-               (df[['interview__id', 'variable_name', 'roster_level']] != '')
-
-        # Use the mask to replace invalid values with an empty string
-        filtered_df = df.where(mask, '')
+        return self.dataset.questionnaire
 
-        # Concatenate the columns with an underscore separator
-        df['index_col'] = filtered_df['interview__id'].astype(str) + "_" + \
-                          filtered_df['variable_name'].astype(str) + "_" + \
-                          filtered_df['roster_level'].astype(str)
+    def add_questionnaire_attributes(self, df, columns):
+        # paradata and microdata only carry the questionnaire key, join the attributes needed by the features
+        # The imported frames are shared, a copy is returned so that the columns added later do not alter them
+        if self.df_questionaire.empty or 'qnr_seq' not in df.columns:
+            return df.copy()
+        return df.merge(self.df_questionaire[QUESTIONNAIRE_KEY + columns], how='left', on=QUESTIONNAIRE_KEY)
 
-        # Remove trailing and leading underscores if they exist
-        df['index_col'] = df['index_col'].str.strip('_')
+    def make_index_col(self, df):
+        # index_col, integer key of the item (interview__id, variable_name, roster_level), NaN counting as ''.
+        # Keys are shared by paradata and microdata, self._item_index is the reverse lookup table of the keys
+        items = df[self.item_level_columns]
+        items = pd.MultiIndex.from_frame(items.where(items.notna(), ''))
+        if self._item_index is None:
+            self._item_index = items.unique()
+        else:
+            new_items = items[~items.isin(self._item_index)].unique()
+            self._item_index = self._item_index.append(new_items)
+        df['index_col'] = self._item_index.get_indexer(items)
         return df
 
+    def get_items(self, index_col):
+        # Reverse lookup of index_col, returns the interview__id, variable_name and roster_level of the keys
+        return self._item_index[index_col].to_frame(index=False)
+
     def make_df_item(self, microdata):
 
+        microdata = self.add_questionnaire_attributes(microdata, ['variable_name', 'type', 'is_integer', 'n_answers',
+                                                                  'answer_sequence', 'cascade_from_question_id',
+                                                                  'is_filtered_combobox'])
         microdata = self.make_index_col(microdata)
-        df_item = microdata[['value', 'type', 'is_integer', 'qnr_seq',
+        df_item = microdata[['value', 'value_numeric', 'type', 'is_integer', 'qnr_seq',
                              'n_answers', 'answer_sequence',
                              'cascade_from_question_id', 'is_filtered_combobox',
                              'index_col'] + self.item_level_columns]
@@ -159,7 +235,7 @@ class FeatureProcessing(ImportManager):
             # Remove records that have variable_name as empty string, i.e. Pauses
             df_time = df_time[df_time['variable_name'] != '']
             # summarize on item level
-            df_time = df_time.groupby(self.item_level_columns + ['index_col']).agg(
+            df_time = df_time.groupby(self.item_level_columns + ['index_col'], observed=True).agg(
                 f__answer_duration=('f__answer_duration', 'sum'),
                 f__comment_duration=('f__comment_duration', 'sum'),
             ).reset_index()
@@ -172,16 +248,31 @@ class FeatureProcessing(ImportManager):
         return df_item
 
     def get_df_time(self):
+        # The timeline is shared by the item, pause and unit time features, it is built once and cached until
+        # invalidate_df_time is called. The consumers must not modify it
+        if self._df_time is None:
+            self._df_time = self.make_df_time()
+        return self._df_time
+
+    def invalidate_df_time(self):
+        # To be called whenever the paradata change, the timeline is built again on the next get_df_time
+        self._df_time = None
+
+    def make_df_time(self):
         # f__answer_duration, total time spent to record answers, i.e.,
         # sum of all time-intervals from active events ending with the item being AnswerSet or AnswerRemoved
         # f__comment_duration, total time spent to comment, i.e.,
         # sum of all time-intervals from active events ending with the item being CommentSet
         ###### ITEM features
-        df_time = self.df_active_paradata
-
-        # calculate time difference in seconds
-        df_time['time_difference'] = df_time.groupby('interview__id')['timestamp_local'].diff()
-        df_time['time_difference'] = df_time['time_difference'].dt.total_seconds()
+        # work on a copy, the time columns are not written into the active paradata
+        df_time = self.df_active_paradata.copy()
+
+        # calculate time difference in seconds, in one scan of the events of each interview
+        timestamps = df_time['timestamp_local'].to_numpy(dtype='datetime64[ns]')
+        _, difference, has_difference = scan_event_stream(get_group_offsets(df_time['interview__id']),
+                                                          timestamps.view('int64'), ~np.isnat(timestamps),
+                                                          use_numba=self.use_numba)
+        df_time['time_difference'] = np.where(has_difference, difference / 1e9, np.nan)
         df_time['f__time_changed'] = np.where(df_time['time_difference'] < -180, df_time['time_difference'], np.nan)
         df_time.loc[df_time['time_difference'] < 0, 'time_difference'] = pd.NA
         # time for answers/comments
@@ -199,7 +290,7 @@ class FeatureProcessing(ImportManager):
 
         # Get the min date from the min question sequesce as there might be some time setting
         # change later that would change the starting date if just looking at the min of timestamp_local
-        starting_timestamp = df_time[df_time['event'].isin(['AnswerSet'])].groupby('interview__id')[
+        starting_timestamp = df_time[df_time['event'].isin(['AnswerSet'])].groupby('interview__id', observed=True)[
             'timestamp_local'].min()
         df_time['f__starting_timestamp'] = df_time['interview__id'].map(starting_timestamp)
 
@@ -211,47 +302,53 @@ class FeatureProcessing(ImportManager):
 
     def get_df_sequence(self):
 
-        df_last = self.df_active_paradata[self.df_active_paradata['event'] == 'AnswerSet'].groupby(
-            'index_col').last()
-        df_last = df_last.sort_values(['interview__id', 'order']).reset_index()
+        # last AnswerSet of each item, the active paradata being sorted by interview__id and order. The columns are
+        # projected first and the categoricals are not aggregated, as groupby().last() on them is very slow
+        sequence_columns = ['index_col', 'interview__id', 'order', 'variable_name', 'answer', 'roster_level',
+                            'question_sequence']
+        df_last = self.df_active_paradata.loc[self.df_active_paradata['event'] == 'AnswerSet', sequence_columns]
+        df_last = df_last.drop_duplicates('index_col', keep='last')
+        df_last = df_last.sort_values(['interview__id', 'order']).reset_index(drop=True)
+
+        # The answers of each interview are scanned once, for the previous answer set and the question sequence
+        question_sequence = df_last['question_sequence']
+        previous, difference, has_difference = scan_event_stream(
+            get_group_offsets(df_last['interview__id']), question_sequence.fillna(0).to_numpy(dtype='int64'),
+            question_sequence.notna().to_numpy(dtype=bool), use_numba=self.use_numba)
 
         # f__previous_question, f__previous_answer, f__previous_roster for previous answer set
-        df_last['f__previous_question'] = df_last.groupby('interview__id')['variable_name'].shift(
-            fill_value=pd.NA)
-        df_last['f__previous_answer'] = df_last.groupby('interview__id')['answer'].shift(
-            fill_value='')
-        df_last['f__previous_roster'] = df_last.groupby('interview__id')['roster_level'].shift(
-            fill_value='')
+        df_last['f__previous_question'] = take_previous(df_last['variable_name'], previous, pd.NA)
+        df_last['f__previous_answer'] = take_previous(df_last['answer'], previous, '')
+        df_last['f__previous_roster'] = take_previous(df_last['roster_level'], previous, '')
         # f__sequence_jump, Difference between actual answer sequence and
-        # question sequence in the questionnaire, in difference to previous question
-        df_last['answer_sequence'] = df_last.groupby('interview__id').cumcount() + 1
-        df_last['diff'] = df_last['question_sequence'] - df_last['answer_sequence']
-        df_last['f__sequence_jump'] = df_last.groupby('interview__id')['diff'].diff()
+        # question sequence in the questionnaire, in difference to previous question. As the answer sequence
+        # increases by one from an answer to the next, it is the question sequence difference minus one
+        df_last['f__sequence_jump'] = np.where(has_difference, difference - 1, np.nan)
 
         return df_last
 
     def process_paradata(self, paradata):
 
-        # streamline missing (empty, NaN) to '', important to identify duplicates in terms of the roster below
-        paradata.fillna('', inplace=True)
-
-        paradata['f__answer_hour_set'] = (paradata['timestamp_local'].dt.hour + paradata[
-            'timestamp_local'].dt.round(
-            '30min').dt.minute / 60)
+        paradata = self.add_questionnaire_attributes(paradata, ['variable_name', 'type', 'question_type',
+                                                                'question_scope', 'yes_no_view', 'question_sequence'])
 
         # interviewing, True prior to Supervisor/HQ interaction, else False
-        events_split = ['RejectedBySupervisor', 'OpenedBySupervisor', 'OpenedByHQ', 'RejectedByHQ']
-        # Create a flag indicating whether each row has an event in `events_split`
-        paradata['flag'] = paradata['event'].isin(events_split)
+        # Filter first, so that the derived columns are only computed on the events kept. The events are usually
+        # already filtered while imported, see paradata_interviewing_only
+        paradata['interviewing'] = get_interviewing_mask(paradata, set())
+        paradata = paradata[(paradata['interviewing'] == True) & (paradata['role'] == 1)].copy()
 
-        # Use `groupby` and `cumsum` to count how many flagged events occur for each group
-        # If the count is greater than 0, then the 'interviewing' column should be False
-        paradata['cumulative_flag'] = paradata.groupby('interview__id')['flag'].cumsum()
-        paradata['interviewing'] = np.where(paradata['cumulative_flag'] > 0, False, True)
+        # keep native dtypes for the questionnaire attributes, <NA> for events not related to a question
+        paradata = paradata.astype({col: dtype for col, dtype in PARADATA_ATTRIBUTE_DTYPES.items()
+                                    if col in paradata.columns})
+        # streamline missing (empty, NaN) to '' in the string columns, important to identify duplicates in terms of
+        # the roster below
+        string_columns = paradata.select_dtypes(include=['object', 'category']).columns
+        paradata.fillna({col: '' for col in string_columns}, inplace=True)
 
-        # Cleanup the intermediate columns
-        paradata.drop(['flag', 'cumulative_flag'], axis=1, inplace=True)
-        paradata = paradata[(paradata['interviewing'] == True) & (paradata['role'] == 1)].copy()
+        paradata['f__answer_hour_set'] = (paradata['timestamp_local'].dt.hour + paradata[
+            'timestamp_local'].dt.round(
+            '30min').dt.minute / 60)
 
         paradata = self.make_index_col(paradata)
         paradata.sort_values(['interview__id', 'order'], inplace=True)
@@ -279,10 +376,6 @@ class FeatureProcessing(ImportManager):
         processed_data_path = os.path.join(survey_path, 'processed_data')
         df.to_pickle(os.path.join(processed_data_path, f'{file_name}.pkl'))
 
-    def get_make_methods(self, method_type='feature', level='item'):
-        return [method for method in dir(self) if method.startswith(f"make_{method_type}_{level}__")
-                and callable(getattr(self, method))]
-
     ###### Feature item methods
     def make_feature_item__string_length(self, feature_name):
         # f__string_length, length of string answer, if TextQuestions else empty pd.NA
@@ -294,16 +387,13 @@ class FeatureProcessing(ImportManager):
     def make_feature_item__numeric_response(self, feature_name):
         # f__numeric_response, response, if NumericQuestions, else empty pd.NA
         self._df_item[feature_name] = np.nan
-        self._df_item.loc[self.numeric_question_mask, feature_name] = \
-            self._df_item[self.numeric_question_mask]['value'].astype(
-                float)
+        self._df_item.loc[self.numeric_question_mask, feature_name] = self.numeric_values
 
     def make_feature_item__first_digit(self, feature_name):
         # f__first_digit, first digit of the response if numeric question else empty pd.NA
         self._df_item[feature_name] = pd.NA
         self._df_item.loc[self.numeric_question_mask, feature_name] = \
-            pd.to_numeric(self._df_item.loc[self.numeric_question_mask, 'value']).abs().astype(str).str[0].astype(
-                'Int64')
+            self.numeric_values.abs().astype(str).str[0].astype('Int64')
 
     def make_feature_item__last_digit(self, feature_name):
         # f__last_digit, modulus of 10 of the response if numeric question else empty pd.NA
@@ -315,8 +405,7 @@ class FeatureProcessing(ImportManager):
             else:
                 return pd.NA
 
-        self._df_item.loc[self.numeric_question_mask, feature_name] = pd.to_numeric(
-            self._df_item.loc[self.numeric_question_mask, 'value']).astype('int64')
+        self._df_item.loc[self.numeric_question_mask, feature_name] = self.numeric_values.astype('int64')
 
         self._df_item.loc[self.numeric_question_mask, feature_name] = self._df_item.loc[
             self.numeric_question_mask, feature_name].apply(extract_last_digit)
@@ -325,7 +414,7 @@ class FeatureProcessing(ImportManager):
         # f__first_decimal, first decimal digit if numeric question else empty pd.NA
         decimal_question_mask = (self._df_item['is_integer'] == False) & (self._df_item['value'] != '')
         self._df_item[feature_name] = pd.NA
-        values = self._df_item.loc[decimal_question_mask, 'value'].astype(float)
+        values = self.numeric_values.reindex(self._df_item.index[decimal_question_mask])
         self._df_item.loc[decimal_question_mask, feature_name] = np.floor(values * 100) % 100
         self._df_item[feature_name] = self._df_item[feature_name].astype('Int64')
 
@@ -353,56 +442,73 @@ class FeatureProcessing(ImportManager):
         removed_mask = (self.df_paradata['event'] == 'AnswerRemoved') & (self.df_paradata['role'] == 1)
         df_item_removed = self.df_paradata[removed_mask]
 
-        df_item_removed = df_item_removed.groupby(['interview__id', 'responsible', 'variable_name', 'qnr_seq', ]).agg(
+        df_item_removed = df_item_removed.groupby(['interview__id', 'responsible', 'variable_name', 'qnr_seq', ],
+                                                  observed=True, dropna=False).agg(
             f__answer_removed=('order', 'count'),
         )
         return df_item_removed.reset_index()
 
-    def make_feature_item__answer_changed(self, feature_name):
+    @staticmethod
+    def get_previous_position(keys):
+        # Position of the previous row with the same key, -1 for the first row of each key
+        positions = pd.Series(np.arange(len(keys)), index=keys.index)
+        return positions.groupby(keys.to_numpy()).shift().fillna(-1).to_numpy().astype('int64')
 
-        df_changed_temp = self.df_active_paradata[self.df_active_paradata['event'] == 'AnswerSet']
-        df_changed_temp[feature_name] = False
+    @staticmethod
+    def get_removed_answers(answers, previous):
+        # True for the rows not keeping all the answers of their previous row, answers being the lists of answers
+        # of the rows by position (NaN if not compared) and previous the position of the previous row of the item.
+        # The answers are encoded as integer (row, answer) keys, so that the comparison is a single np.isin
+        answers = answers.explode().dropna()
+        rows = answers.index.to_numpy()
+        codes, uniques = pd.factorize(answers.to_numpy())
+        removed = np.zeros(len(previous), dtype=bool)
+        # next row of each row, the answers of a row are compared to those of its next row
+        next_row = np.full(len(previous), -1)
+        has_previous = previous >= 0
+        next_row[previous[has_previous]] = np.flatnonzero(has_previous)
+        compared = next_row[rows] >= 0
+        next_keys = next_row[rows[compared]] * len(uniques) + codes[compared]
+        missing = ~np.isin(next_keys, rows * len(uniques) + codes)
+        removed[next_row[rows[compared]][missing]] = True
+        return removed
+
+    def make_feature_item__answer_changed(self, feature_name):
+        # f__answer_changed, number of AnswerSet events removing answers set by the previous AnswerSet of the item
+        df_changed_temp = self.df_active_paradata.loc[self.df_active_paradata['event'] == 'AnswerSet',
+                                                      ['index_col', 'type', 'yes_no_view', 'answer']]
+        df_changed_temp = df_changed_temp.reset_index(drop=True)
+        answer = df_changed_temp['answer']
+        previous = self.get_previous_position(df_changed_temp['index_col'])
+        changed = np.zeros(len(df_changed_temp), dtype=bool)
 
         # list and multi-select questions (without yes_no_mode)
-        list_mask = (df_changed_temp['type'] == 'TextListQuestion')
-        multi_mask = (df_changed_temp['yes_no_view'] == False)
-        df_changed_temp['answer_list'] = pd.NA
-        df_changed_temp.loc[list_mask, 'answer_list'] = df_changed_temp.loc[list_mask, 'answer'].str.split('|')
-        df_changed_temp.loc[multi_mask, 'answer_list'] = df_changed_temp.loc[multi_mask, 'answer'].str.split(
-            ', |\\|')
-        df_changed_temp['prev_answer_list'] = df_changed_temp.groupby(self.item_level_columns + ['index_col'])[
-            'answer_list'].shift()
-        answers_mask = df_changed_temp['prev_answer_list'].notna()
-        df_changed_temp.loc[answers_mask, feature_name] = df_changed_temp.loc[answers_mask].apply(
-            lambda row: not set(row['prev_answer_list']).issubset(set(row['answer_list'])), axis=1)
+        list_mask = (df_changed_temp['type'] == 'TextListQuestion').to_numpy()
+        multi_mask = (df_changed_temp['yes_no_view'] == False).fillna(False).to_numpy(dtype=bool)
+        answer_list = pd.Series(np.nan, index=answer.index, dtype=object)
+        answer_list[list_mask] = answer[list_mask].str.split('|')
+        answer_list[multi_mask] = answer[multi_mask].str.split(', |\\|')
+        # only compared to a previous AnswerSet of a list or multi-select question
+        list_previous = np.where((previous >= 0) & (list_mask | multi_mask)[previous], previous, -1)
+        changed |= self.get_removed_answers(answer_list, list_previous)
 
         # single answer question
-        df_changed_temp['prev_answer'] = df_changed_temp.groupby(self.item_level_columns + ['index_col'])[
-            'answer'].shift()
+        prev_answer = answer.to_numpy()[previous]
         single_answer_mask = (~df_changed_temp['type'].isin(['MultyOptionsQuestion', 'TextListQuestion'])) & \
-                             (df_changed_temp['prev_answer'].notna()) & \
-                             (df_changed_temp['answer'] != df_changed_temp['prev_answer'])
-        df_changed_temp.loc[single_answer_mask, feature_name] = True
-
-        # yes_no_view questions
-        yesno_mask = (df_changed_temp['yes_no_view'] == True)
-        df_filtered = df_changed_temp[yesno_mask].copy()
-        df_filtered[['yes_list', 'no_list']] = df_filtered['answer'].str.split('|', expand=True)
-        df_filtered['yes_list'] = df_filtered['yes_list'].str.split(', ').apply(
-            lambda x: [] if x == [''] or x is None else x)
-        df_filtered['no_list'] = df_filtered['no_list'].str.split(', ').apply(
-            lambda x: [] if x == [''] or x is None else x)
-        df_filtered['prev_yes_list'] = df_filtered.groupby(self.item_level_columns + ['index_col'])['yes_list'].shift(
-            fill_value=[])
-        df_filtered['prev_no_list'] = df_filtered.groupby(self.item_level_columns + ['index_col'])['no_list'].shift(
-            fill_value=[])
-        df_changed_temp.loc[yesno_mask, feature_name] = df_filtered.apply(
-            lambda row: not set(row['prev_yes_list']).issubset(set(row['yes_list'])), axis=1)
-        df_changed_temp.loc[yesno_mask, feature_name] = df_filtered.apply(
-            lambda row: not set(row['prev_no_list']).issubset(set(row['no_list'])), axis=1)
+                             (previous >= 0) & \
+                             (answer != prev_answer)
+        changed[single_answer_mask.to_numpy()] = True
+
+        # yes_no_view questions, answers removed from the no list, i.e. after the '|'
+        yesno_mask = (df_changed_temp['yes_no_view'] == True).fillna(False).to_numpy(dtype=bool)
+        no_answers = answer[yesno_mask].str.split('|').str[1]
+        no_list = no_answers.mask(no_answers == '').str.split(', ').reindex(answer.index)
+        yesno_previous = np.where(yesno_mask & (previous >= 0) & yesno_mask[previous], previous, -1)
+        changed[yesno_mask] = self.get_removed_answers(no_list, yesno_previous)[yesno_mask]
 
         # count on item level
-        df_changed_temp = df_changed_temp.groupby('index_col')[feature_name].sum().reset_index()
+        df_changed_temp[feature_name] = changed
+        df_changed_temp = df_changed_temp.groupby('index_col', observed=True)[feature_name].sum().reset_index()
         self._df_item[feature_name] = self._df_item['index_col'].map(
             df_changed_temp.set_index('index_col')[feature_name])
 
@@ -429,7 +535,7 @@ class FeatureProcessing(ImportManager):
 
         df_item_comment = self.df_paradata[comment_mask].copy()
         df_item_comment[feature_name] = df_item_comment['answer'].str.len()
-        df_item_comment = df_item_comment.groupby('index_col').agg(
+        df_item_comment = df_item_comment.groupby('index_col', observed=True).agg(
             f__comment_length=(feature_name, 'sum'),
         )
         self._df_item[feature_name] = self._df_item['index_col'].map(
@@ -441,12 +547,13 @@ class FeatureProcessing(ImportManager):
                        (self.df_paradata['role'] == 1)
 
         df_item_comment = self.df_paradata[comment_mask].copy()
-        df_item_comment = df_item_comment.groupby('index_col').agg(
+        df_item_comment = df_item_comment.groupby('index_col', observed=True).agg(
             f__comment_set=('order', 'count'),
         )
         self._df_item[feature_name] = self._df_item['index_col'].map(
             df_item_comment[feature_name])
 
+    @feature_node(outputs=['f__gps_latitude', 'f__gps_longitude', 'f__gps_accuracy'])
     def make_feature_item__gps(self, feature_name):
         # f__gps_latitude, f__gps_longitude, f__gps_accuracy
         gps_mask = self._df_item['type'] == 'GpsCoordinateQuestion'
@@ -470,10 +577,10 @@ class FeatureProcessing(ImportManager):
                            & (self._df_item['type'] != 'Variable')
                            )
         df_answer_set = self._df_item[answer_set_mask]
-        df_answer_set = df_answer_set.groupby('interview__id').agg(
+        df_answer_set = df_answer_set.groupby('interview__id', observed=True).agg(
             f__number_answered=('value', 'count')
         )
-        self._df_unit[feature_name] = self._df_unit['interview__id'].map(
+        self._df_unit[feature_name] = map_categorical_column(self._df_unit['interview__id'],
             df_answer_set[feature_name])
         self._df_unit[feature_name].fillna(0, inplace=True)
 
@@ -483,10 +590,10 @@ class FeatureProcessing(ImportManager):
                                     | (self._df_item['value'] == '##N/A##')
                             ) & (self._df_item['type'] != 'Variable')
         df_answer_set = self._df_item[answer_unset_mask]
-        df_answer_set = df_answer_set.groupby('interview__id').agg(
+        df_answer_set = df_answer_set.groupby('interview__id', observed=True).agg(
             f__number_unanswered=('value', 'count')
         )
-        self._df_unit[feature_name] = self._df_unit['interview__id'].map(
+        self._df_unit[feature_name] = map_categorical_column(self._df_unit['interview__id'],
             df_answer_set[feature_name])
         # Set to zero if not answered is not present
         self._df_unit[feature_name].fillna(0, inplace=True)
@@ -497,7 +604,7 @@ class FeatureProcessing(ImportManager):
 
         df_trans_temp = self.df_paradata.loc[
             trans_mask, ['interview__id', 'order', 'event', 'param']].copy().reset_index()
-        df_trans_temp['seq'] = df_trans_temp.groupby('interview__id').cumcount() + 1
+        df_trans_temp['seq'] = df_trans_temp.groupby('interview__id', observed=True).cumcount() + 1
 
         # Define a function to calculate the relative positions
         def relative_translation_positions(group):
@@ -507,10 +614,10 @@ class FeatureProcessing(ImportManager):
             return relative_positions
 
         # Group by 'interview__id' and apply the function
-        df_trans_temp = df_trans_temp.groupby('interview__id').apply(
+        df_trans_temp = df_trans_temp.groupby('interview__id', observed=True).apply(
             relative_translation_positions).reset_index().rename(columns={0: feature_name})
 
-        self._df_unit[feature_name] = self._df_unit['interview__id'].map(
+        self._df_unit[feature_name] = map_categorical_column(self._df_unit['interview__id'],
             df_trans_temp.set_index('interview__id')[feature_name])
 
     def add_pause_features(self, df_unit):
@@ -519,7 +626,7 @@ class FeatureProcessing(ImportManager):
                           'f__pause_list']
         if any(col in self._allowed_features for col in pause_features):
             df_pause = self.get_df_time()
-            df_pause = df_pause.groupby('interview__id').agg(
+            df_pause = df_pause.groupby('interview__id', observed=True).agg(
                 f__pause_count=('f__pause_duration', 'size'),  # Count all occurrences
                 f__pause_duration=('f__pause_duration', 'sum'),  # Sum non-null values
                 f__pause_list=('f__pause_duration', lambda x: x.tolist())
@@ -540,7 +647,7 @@ class FeatureProcessing(ImportManager):
         if any(col in self._allowed_features for col in time_features):
             df_time = self.get_df_time()
 
-            df_dur = df_time.groupby('interview__id').agg(
+            df_dur = df_time.groupby('interview__id', observed=True).agg(
                 f__total_duration=('f__total_duration', 'sum'),
                 f__total_elapse=('timestamp_local', lambda x: (x.max() - x.min()).total_seconds()),
                 f__time_changed=('f__time_changed', 'sum'),
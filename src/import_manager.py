@@ -1,78 +1,355 @@
+import hashlib
+import io
 import json
 import pandas as pd
 import numpy as np
 import os
 import shutil
 import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from pandas.io.stata import StataMissingValue
 from src.utils.general_utils import *
+from src.utils.export_utils import *
 
 
-def load_dataframes(processed_data_path):
-    df_paradata = pd.read_pickle(os.path.join(processed_data_path, 'paradata.pkl'))
-    df_microdata = pd.read_pickle(os.path.join(processed_data_path, 'microdata.pkl'))
-    df_questionnaire = pd.read_pickle(os.path.join(processed_data_path, 'questionnaire.pkl'))
+# Bump CACHE_VERSION whenever the layout of the processed frames changes, so that caches written
+# by previous releases are ignored and rebuilt from the export files.
+CACHE_VERSION = 4
+CACHE_INFO_FILE = 'cache_info.json'
+CACHE_FRAMES = ['paradata', 'questionnaire', 'microdata']
 
-    # df_paradata = pd.read_csv(os.path.join(processed_data_path, 'paradata.csv'))
-    # df_microdata = pd.read_csv(os.path.join(processed_data_path, 'microdata.csv'))
-    # df_questionnaire = pd.read_csv(os.path.join(processed_data_path, 'questionnaire.csv'))
+# Columns identifying a questionnaire item. The paradata and microdata only carry this key, the questionnaire
+# attributes are joined from the questionnaire when needed.
+QUESTIONNAIRE_KEY = ['survey_name', 'survey_version', 'qnr_seq']
 
-    # paradata_dtypes = pd.read_pickle(os.path.join(processed_data_path, 'df_paradata_dtypes.pkl'))
-    # df_paradata = assign_type(df_paradata, paradata_dtypes)
-    #
-    # microdata_dtypes = pd.read_pickle(os.path.join(processed_data_path, 'df_microdata_dtypes.pkl'))
-    # df_microdata = assign_type(df_microdata, microdata_dtypes)
-    #
-    # questionnaire_dtypes = pd.read_pickle(os.path.join(processed_data_path, 'df_questionnaires_dtypes.pkl'))
-    # df_questionnaire = assign_type(df_questionnaire, questionnaire_dtypes)
+# String keys that are dictionary encoded as categoricals sharing the same categories across the frames
+CATEGORICAL_COLUMNS = ['interview__id', 'responsible', 'variable_name', 'event', 'type', 'roster_level',
+                       'survey_name', 'survey_version']
 
-    return df_paradata, df_questionnaire, df_microdata
 
+def _to_json_value(value):
+    """
+    This function converts numpy scalars and other non-JSON types to values that json.dumps can serialize.
+    """
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+
+def encode_nested_columns(df):
+    """
+    This function serializes object columns that Parquet cannot store natively (lists, dicts and columns mixing
+    different python types) to JSON strings, so that the DataFrame can be written with an explicit schema.
+
+    Parameters:
+    df (DataFrame): The DataFrame to be encoded.
+
+    Returns:
+    df (DataFrame): A shallow copy of the DataFrame with the nested columns encoded.
+    json_columns (list): The names of the columns that have been encoded.
+    """
+    df = df.copy(deep=False)
+    json_columns = []
+    for col in df.columns[df.dtypes == object]:
+        if pd.api.types.infer_dtype(df[col], skipna=True) not in ['string', 'boolean', 'empty']:
+            df[col] = df[col].map(lambda x: json.dumps(x, default=_to_json_value), na_action='ignore')
+            json_columns.append(col)
+    return df, json_columns
+
+
+def decode_nested_columns(df, json_columns):
+    """
+    This function restores the columns serialized by encode_nested_columns.
+
+    Parameters:
+    df (DataFrame): The DataFrame read from the cache.
+    json_columns (list): The names of the columns that have been encoded.
+
+    Returns:
+    df (DataFrame): The DataFrame with the nested columns decoded.
+    """
+    for col in json_columns:
+        if col in df.columns:
+            df[col] = df[col].map(json.loads, na_action='ignore')
+    return df
+
+
+def get_cache_info(processed_data_path):
+    """
+    This function reads the metadata stored along with the processed data.
+
+    Parameters:
+    processed_data_path (str): The directory path where the processed data is stored.
+
+    Returns:
+    dict: The cache metadata, or None if the directory does not contain a valid cache.
+    """
+    info_path = os.path.join(processed_data_path, CACHE_INFO_FILE)
+    if not os.path.exists(info_path):
+        return None
+    with open(info_path, encoding='utf8') as file:
+        cache_info = json.load(file)
+    if cache_info.get('cache_version') != CACHE_VERSION:
+        return None
+    return cache_info
+
+
+def load_previous_paradata(processed_data_path, fingerprint, interviewing_only=False):
+    """
+    This function loads the processed paradata of a previous import of the same survey version, so that only the
+    events added since then need to be parsed. The paradata can only be reused if they have been merged with the
+    same questionnaire and filtered the same way.
+
+    Parameters:
+    processed_data_path (str): The directory path where the processed data is stored.
+    fingerprint (dict): The fingerprint of the current export files.
+    interviewing_only (bool): Whether the paradata are filtered to the events recorded while interviewing.
+
+    Returns:
+    DataFrame: The processed paradata, None if there is no reusable cache.
+    """
+    cache_info = get_cache_info(processed_data_path)
+    if cache_info is None or cache_info.get('interviewing_only', False) != interviewing_only:
+        return None
+    questionnaire_crc = get_member_crc(fingerprint, QUESTIONNAIRE_ZIP)
+    if questionnaire_crc is None or questionnaire_crc != get_member_crc(cache_info.get('fingerprint'),
+                                                                        QUESTIONNAIRE_ZIP):
+        return None
+    df = pd.read_parquet(os.path.join(processed_data_path, 'paradata.parquet'))
+    return decode_nested_columns(df, cache_info['json_columns']['paradata'])
+
+
+def load_dataframes(processed_data_path, columns=None):
+    """
+    This function loads the processed paradata, questionnaire and microdata from the columnar cache.
+
+    Parameters:
+    processed_data_path (str): The directory path where the processed data is stored.
+    columns (dict): Optional mapping from frame name ('paradata', 'questionnaire', 'microdata') to the list of columns
+    to be loaded. Frames not in the mapping are loaded entirely.
 
-def save_dataframes(df_paradata, df_questionnaires, df_microdata, processed_data_path):
+    Returns:
+    df_paradata, df_questionnaire, df_microdata (DataFrame): The processed DataFrames.
+    """
+    cache_info = get_cache_info(processed_data_path)
+    if cache_info is None:
+        raise ValueError(f"ERROR: {processed_data_path} does not contain a valid cache.")
+    columns = columns or {}
+    dfs = {}
+    for name in CACHE_FRAMES:
+        file_path = os.path.join(processed_data_path, f'{name}.parquet')
+        frame_columns = columns.get(name)
+        if frame_columns is not None:
+            frame_columns = [col for col in frame_columns if col in cache_info['schema'][name]]
+        df = pd.read_parquet(file_path, columns=frame_columns)
+        dfs[name] = decode_nested_columns(df, cache_info['json_columns'][name])
+
+    return dfs['paradata'], dfs['questionnaire'], dfs['microdata']
+
+
+def save_dataframes(df_paradata, df_questionnaires, df_microdata, processed_data_path, metadata=None):
+    """
+    This function saves the processed paradata, questionnaire and microdata as Parquet files, together with a
+    cache_info.json file holding the cache version, the schema and the JSON-encoded columns of each frame.
+
+    Parameters:
+    df_paradata (DataFrame): The DataFrame containing the paradata.
+    df_questionnaires (DataFrame): The DataFrame containing the questionnaire.
+    df_microdata (DataFrame): The DataFrame containing the microdata.
+    processed_data_path (str): The directory path where the processed data is stored.
+    metadata (dict): Optional information describing how the data were imported, stored in cache_info.json.
+    """
     if not os.path.exists(processed_data_path):
         os.makedirs(processed_data_path)
-    df_paradata.to_pickle(os.path.join(processed_data_path, 'paradata.pkl'))
-    # # Save Questionaire
-    df_questionnaires.to_pickle(os.path.join(processed_data_path, 'questionnaire.pkl'))
-    # # Save Microdata dtypes
-    df_microdata.to_pickle(os.path.join(processed_data_path, 'microdata.pkl'))
+    cache_info = {'cache_version': CACHE_VERSION, 'schema': {}, 'json_columns': {}}
+    cache_info.update(metadata or {})
+    for name, df in zip(CACHE_FRAMES, [df_paradata, df_questionnaires, df_microdata]):
+        df, json_columns = encode_nested_columns(df)
+        df.to_parquet(os.path.join(processed_data_path, f'{name}.parquet'), index=False)
+        cache_info['schema'][name] = {col: str(dtype) for col, dtype in df.dtypes.items()}
+        cache_info['json_columns'][name] = json_columns
+        # Remove pickles written by previous versions
+        legacy_path = os.path.join(processed_data_path, f'{name}.pkl')
+        if os.path.exists(legacy_path):
+            os.remove(legacy_path)
+
+    # Write the metadata last, so that an interrupted save does not leave a cache flagged as valid
+    with open(os.path.join(processed_data_path, CACHE_INFO_FILE), 'w', encoding='utf8') as file:
+        json.dump(cache_info, file, indent=2)
+
+
+def encode_categorical_columns(dfs, columns=None, reference_dfs=None):
+    """
+    This function dictionary encodes string columns as categoricals. A column gets the same categories in all the
+    DataFrames, so that masks, groupbys and merges on it work on the integer codes. The categories are sorted,
+    so that sorting on the codes gives the same order as sorting on the strings, and always include '' so that
+    missing values can be filled with ''.
 
-    # # Save Paradata csv
-    # df_paradata.to_csv(os.path.join(processed_data_path, 'paradata.csv'), index=False)
-    # # Save Questionaire
-    # df_questionnaires.to_csv(os.path.join(processed_data_path, 'questionnaire.csv'), index=False)
-    # # Save Microdata dtypes
-    # df_microdata.to_csv(os.path.join(processed_data_path, 'microdata.csv'), index=False)
+    Parameters:
+    dfs (list): The DataFrames to be encoded, modified in place.
+    columns (list): The columns to be encoded, defaults to CATEGORICAL_COLUMNS. Columns holding values other than
+    strings are left as they are.
+    reference_dfs (list): Optional DataFrames already encoded, e.g. kept while the others are imported again. Their
+    categories are included, so that the columns of dfs get the same categories, and they are not modified.
 
-    # # Save Paradata dtypes
-    # df_paradata.dtypes.to_pickle(os.path.join(processed_data_path, 'df_paradata_dtypes.pkl'))
-    # # Save Questionaire dtypes
-    # df_questionnaires.dtypes.to_pickle(os.path.join(processed_data_path, 'df_questionnaires_dtypes.pkl'))
-    # # Save Paradata dtypes
-    # df_microdata.dtypes.to_pickle(os.path.join(processed_data_path, 'df_microdata_dtypes.pkl'))
+    Returns:
+    dfs (list): The encoded DataFrames.
+    """
+    for col in CATEGORICAL_COLUMNS if columns is None else columns:
+        frames = [df for df in dfs if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype)]
+        if not frames:
+            continue
+        values = pd.concat([pd.Series(df[col].dropna().unique(), dtype=object) for df in frames], ignore_index=True)
+        if pd.api.types.infer_dtype(values, skipna=True) not in ['string', 'empty']:
+            continue
+        categories = set(values) | {''}
+        for df in reference_dfs or []:
+            if col in df.columns and isinstance(df[col].dtype, pd.CategoricalDtype):
+                categories.update(df[col].cat.categories)
+        dtype = pd.CategoricalDtype(sorted(categories))
+        for df in frames:
+            df[col] = df[col].astype(dtype)
+    return dfs
+
+
+def decode_categorical_columns(df):
+    """
+    This function converts back the categorical columns of a DataFrame to strings.
 
+    Parameters:
+    df (DataFrame): The DataFrame to be decoded.
 
-def get_data(survey_path, survey_name, survey_version):
+    Returns:
+    df (DataFrame): A copy of the DataFrame with object columns instead of categoricals.
+    """
+    df = df.copy()
+    for col in df.columns[[isinstance(dtype, pd.CategoricalDtype) for dtype in df.dtypes]]:
+        df[col] = df[col].astype(object)
+    return df
+
+
+def map_categorical_column(keys, mapping):
+    """
+    This function maps the values of a key column as Series.map does on strings. Series.map on a categorical maps
+    all its categories, including those not in the column, so that integer values, e.g. counts, would come out as
+    float whenever a category is missing from the mapping.
+
+    Parameters:
+    keys (Series): The key column, e.g. interview__id, categorical or not.
+    mapping (Series): The values indexed by key.
+
+    Returns:
+    Series: The mapped values, NaN for the keys missing from the mapping.
+    """
+    if isinstance(keys.dtype, pd.CategoricalDtype):
+        keys = keys.astype(object)
+    return keys.map(mapping)
+
+
+def get_data(survey_path, survey_name, survey_version, paradata_chunksize=None, question_types=None,
+             microdata_workers=1, previous_paradata=None, interviewing_only=False, categories_cache=None):
     """
     This function wraps up the entire process of data extraction from the survey files.
     It calls the get_questionaire, get_paradata, and get_microdata functions in sequence,
     each one with its corresponding arguments.
 
     Parameters:
-    survey_path (str): The directory path where the survey files are located.
+    survey_path (str or source): The directory path where the survey files are located, or a source object
+    giving access to the files, e.g. a ZipSource reading them straight from the export files.
+    survey_name (str): The name of the survey.
+    survey_version (str): The version of the survey.
+    paradata_chunksize (int): The number of paradata rows to be parsed at once.
+    question_types (list): The question types whose microdata are needed, None to import all of them.
+    microdata_workers (int): The number of microdata files processed in parallel.
+    previous_paradata (DataFrame): The paradata processed by a previous import, only the new events are parsed.
+    interviewing_only (bool): Whether to keep only the paradata events recorded by the interviewer while interviewing.
+    categories_cache (str): The directory where the parsed categories are stored across runs, None to not store them.
 
     Returns:
     df_paradata (DataFrame): The DataFrame containing all the paradata.
     df_questionnaires (DataFrame): DataFrame containing information about the questionnaire used for the survey.
     df_microdata (DataFrame): The DataFrame containing all the microdata (survey responses).
     """
-    df_questionnaires = get_questionaire(survey_path, survey_name, survey_version)
-    df_paradata = get_paradata(survey_path, df_questionnaires, survey_name, survey_version)
-    df_microdata = get_microdata(survey_path, df_questionnaires, survey_name, survey_version)
+    df_questionnaires = get_questionaire(survey_path, survey_name, survey_version, categories_cache)
+    df_paradata = get_paradata(survey_path, df_questionnaires, survey_name, survey_version,
+                               chunksize=paradata_chunksize, df_previous=previous_paradata,
+                               interviewing_only=interviewing_only)
+    file_names = get_microdata_files(survey_path, df_questionnaires, question_types)
+    df_microdata = get_microdata(survey_path, df_questionnaires, survey_name, survey_version, file_names,
+                                 workers=microdata_workers, question_types=question_types)
 
     return df_paradata, df_questionnaires, df_microdata
 
 
+def collapse_multi_values(values, transformation_type):
+    """
+    This function collapses the sub-columns of a multi-option, linked or list question into a list per row, in one
+    pass over the NumPy block of the sub-columns.
+
+    For 'unlinked' the list holds the option codes (column suffixes) with a positive value, for 'linked' the non
+    missing values and for 'list' the values other than '##N/A##' and ''. Unset values (-999999999 and '##N/A##')
+    are then removed from the lists. Rows without any value get NaN, rows with only unset values get '##N/A##'.
+
+    Parameters:
+    values (DataFrame): The sub-columns of the question, in the order they appear in the export.
+    transformation_type (str): The type of transformation to apply. Must be 'unlinked', 'linked' or 'list'.
+
+    Returns:
+    list: The collapsed value of each row.
+    """
+    n_rows, n_cols = values.shape
+    if transformation_type == 'unlinked':
+        mask = (values > 0).to_numpy()
+        suffixes = [int(col.split('__')[1].replace('n', '-')) for col in values.columns]
+        items = np.empty((n_rows, n_cols), dtype=object)
+        items[:] = suffixes
+        unset = np.zeros((n_rows, n_cols), dtype=bool)
+    else:
+        if transformation_type == 'linked':
+            # !NOTE! if you add the (df[col] != -999999999) filter it removes also list that not only
+            # contains -999...
+            mask = values.notna().to_numpy()
+        else:
+            mask = ((values != '##N/A##') & (values != '')).to_numpy()
+        items = values.to_numpy(dtype=object)
+        unset = values.isin([-999999999, '##N/A##']).to_numpy()
+        # Values of numeric sub-columns have always been stored as '##N/A##': the former row-wise implementation
+        # compared each NumPy scalar with [], which evaluates to False. Kept as is to preserve the item features.
+        numeric_cols = (values.dtypes != object).to_numpy()
+        items[:, numeric_cols] = '##N/A##'
+
+    keep = mask & ~unset
+    kept_items = items[keep]
+    answered = mask.any(axis=1)
+    is_set = np.zeros((n_rows, n_cols), dtype=bool)
+    is_set[keep] = kept_items != '##N/A##'
+    has_set_value = is_set.any(axis=1)
+
+    rows = np.split(kept_items, np.cumsum(keep.sum(axis=1))[:-1])
+    return [(row.tolist() if is_set_row else '##N/A##') if answered_row else float('nan')
+            for row, answered_row, is_set_row in zip(rows, answered, has_set_value)]
+
+
+def join_gps_values(values):
+    """
+    This function joins the sub-columns of a GPS question into a comma separated string per row. Missing and unset
+    values are left empty.
+
+    Parameters:
+    values (DataFrame): The sub-columns of the GPS question, in the order they appear in the export.
+
+    Returns:
+    ndarray: The joined value of each row, '' if all the sub-columns are empty.
+    """
+    valid = (values.notna() & ~values.isin(['##N/A##', -999999999])).to_numpy()
+    joined = np.full(len(values), '', dtype=object)
+    for j, col in enumerate(values.columns):
+        text = np.where(valid[:, j], values[col].astype(str).to_numpy(dtype=object), '')
+        joined = joined + np.where(joined != '', ',', '').astype(object) + text.astype(object)
+    return joined
+
+
 def transform_multi(df, variable_list, transformation_type):
     """
     This function takes a DataFrame and a list of variable names and applies a transformation depending on
@@ -95,157 +372,309 @@ def transform_multi(df, variable_list, transformation_type):
         raise ValueError("transformation_type must be either 'unlinked', 'linked', 'list', or 'gps'")
 
     transformed_df = pd.DataFrame(index=df.index)  # DataFrame for storing transformations
+    drop_columns = []
 
     for var in variable_list:
         if var in df.columns:
             # Drop the target column, should it exist (only text list question on a linked roster)
-            df = df.drop(var, axis=1)
+            drop_columns.append(var)
 
-        related_cols = [col for col in df.columns if col.startswith(f"{var}__")]
+        related_cols = [col for col in df.columns if col.startswith(f"{var}__") and col not in drop_columns]
 
         if related_cols:
-            transformation = [[] for _ in range(len(df))] \
-                if transformation_type != 'gps' \
-                else ['' for _ in range(len(df))]
-
-            for col in related_cols:
-
-                if transformation_type == 'unlinked':
-                    suffix = int(col.split('__')[1].replace('n', '-'))
-                    mask = df[col] > 0
-                    transformation = [x + [suffix] if mask.iloc[i] else x for i, x in enumerate(transformation)]
-                elif transformation_type == 'linked':
-                    # !NOTE! if you add the (df[col] != -999999999) filter it removes also list that not only
-                    # contains -999...
-                    mask = (df[col].notna())  # & (df[col] != -999999999)
-                    transformation = [x + [df.at[i, col]] if mask.iloc[i] else x for i, x in enumerate(transformation)]
-                elif transformation_type == 'list':
-                    mask = (df[col] != '##N/A##') & (df[col] != '')
-                    transformation = [x + [df.at[i, col]] if mask.iloc[i] else x for i, x in enumerate(transformation)]
-                elif transformation_type == 'gps':
-                    transformation = [x + (',' if x else '') + (str(df.at[i, col])
-                                                                if pd.notna(df.at[i, col])
-                                                                   and df.at[i, col] not in ['##N/A##', -999999999]
-                                                                else '') for i, x in enumerate(transformation)]
-
-            def remove_unset_value(sub_list):
-                sub = list(filter(lambda v: v not in [-999999999, '##N/A##'], sub_list))
-                sub = [ele if ele != [] else '##N/A##' for ele in sub]
-                sub = sub if sub != [] and list(set(sub)) != ['##N/A##'] else '##N/A##'
-                return sub
-
-            transformation = [remove_unset_value(x)
-                              if x else float('nan') for x in transformation] if transformation_type != 'gps' else [
-                x if x else '' for x in transformation]
-            transformed_df[var] = transformation  # Add the transformation to the transformed DataFrame
-            df = df.drop(related_cols, axis=1)  # Drop the original columns
+            values = df[related_cols]
+            if transformation_type == 'gps':
+                transformed_df[var] = join_gps_values(values)
+            else:
+                transformed_df[var] = collapse_multi_values(values, transformation_type)
+            drop_columns.extend(related_cols)  # Drop the original columns
 
+    df = df.drop(drop_columns, axis=1)
     df = pd.concat([df, transformed_df], axis=1)  # Concatenate the original DataFrame with the transformations
 
     return df.copy()
 
 
-def get_microdata(survey_path, df_questionnaires, survey_name, survey_version):
+# Question types of the items each feature is computed on. Features in PARADATA_FEATURES are computed on paradata
+# only, while features in neither of them use the items of any type.
+FEATURE_QUESTION_TYPES = {
+    'string_length': ['TextQuestion'],
+    'numeric_response': ['NumericQuestion'],
+    'first_digit': ['NumericQuestion'],
+    'last_digit': ['NumericQuestion'],
+    'first_decimal': ['NumericQuestion'],
+    'answer_position': ['SingleQuestion'],
+    'single_question': ['SingleQuestion'],
+    'answer_selected': ['MultyOptionsQuestion'],
+    'answer_share_selected': ['MultyOptionsQuestion'],
+    'multi_option_question': ['MultyOptionsQuestion'],
+    'gps': ['GpsCoordinateQuestion'],
+}
+PARADATA_FEATURES = ['answer_removed', 'pause_count', 'pause_duration', 'pause_list', 'total_duration',
+                     'total_elapse', 'days_from_start', 'time_changed']
+
+
+def get_required_question_types(features):
     """
-    This function loads microdata from .dta files in the specified directory and reshapes it into a long format. It also
-    applies a number of transformations to handle multi-options, list, and GPS coordinates questions.
+    This function returns the question types whose microdata are needed to compute the given features.
+
+    Parameters:
+    features (list): The names of the enabled features, as in the configuration file.
+
+    Returns:
+    list: The sorted question types, or None if items of any type are needed.
+    """
+    question_types = set()
+    for feature in features:
+        if feature in FEATURE_QUESTION_TYPES:
+            question_types.update(FEATURE_QUESTION_TYPES[feature])
+        elif feature not in PARADATA_FEATURES:
+            return None
+    return sorted(question_types)
+
+
+def get_file_columns(source, file_name):
+    """
+    This function reads the column names of a .tab or .dta file without reading its data.
+    """
+    with source.open(file_name) as file:
+        if file_name.endswith('.dta'):
+            with pd.read_stata(file, iterator=True) as reader:
+                return list(reader.variable_labels())
+        return file.readline().decode('utf-8-sig').rstrip('\r\n').split('\t')
+
+
+def get_required_variables(df_questionnaires, question_types=None):
+    """
+    This function returns the variables of the questions of the given types, i.e. the variables whose microdata are
+    used by the enabled features.
 
     Parameters:
-    survey_path (str): The directory path where the survey .dta files are located.
     df_questionnaires (DataFrame): DataFrame containing information about the questionnaire used for the survey.
+    question_types (list): The question types whose microdata are needed, None if all of them are needed.
 
     Returns:
-    combined_df (DataFrame): The combined and processed DataFrame containing all survey responses.
+    variables (set): The variable names, None if all the variables are needed.
     """
+    if question_types is None or df_questionnaires.empty:
+        return None
+    return set(df_questionnaires.loc[df_questionnaires['type'].isin(question_types), 'variable_name'])
 
-    # List of variables to exclude
-    drop_list = ['interview__key', 'sssys_irnd', 'has__errors', 'interview__status', 'assignment__id']
 
-    file_names = [file for file in os.listdir(survey_path) if
+def get_microdata_files(survey_path, df_questionnaires, question_types=None):
+    """
+    This function returns the microdata files to be imported, i.e. the .dta and .tab files of the export,
+    excluding the interview__ and assignment__ system files. If question_types is given, only the files
+    containing at least one variable of those types are returned.
+
+    Parameters:
+    survey_path (str or source): The directory path where the survey files are located, or a source object.
+    df_questionnaires (DataFrame): DataFrame containing information about the questionnaire used for the survey.
+    question_types (list): The question types whose microdata are needed, None to return all files.
+
+    Returns:
+    file_names (list): The names of the microdata files.
+    """
+    source = get_source(survey_path)
+    file_names = [file for file in source.list_files() if
                   (file.endswith('.dta') or file.endswith('.tab')) and not file.startswith(
                       ('interview__', 'assignment__', 'paradata.tab'))]
+    variables = get_required_variables(df_questionnaires, question_types)
+    if variables is None:
+        return file_names
+
+    # Multi-option, list and GPS questions are exported as var__N columns
+    return [file_name for file_name in file_names
+            if {col.split('__')[0] for col in get_file_columns(source, file_name)} & variables]
+
+
+def get_multi_variables(df_questionnaires):
+    """
+    This function returns the variables of the questions exported in multiple var__N columns.
 
+    Parameters:
+    df_questionnaires (DataFrame): DataFrame containing information about the questionnaire used for the survey.
+
+    Returns:
+    dict: A dictionary mapping each transform_multi transformation type to the list of its variables.
+    """
+    if df_questionnaires.empty:
+        return {}
     # define multi/list question conditions
-    if df_questionnaires.empty is False:
-        unlinked_mask = (df_questionnaires["type"] == 'MultyOptionsQuestion') & (
-                df_questionnaires['is_linked'] == False)
-        linked_mask = (df_questionnaires["type"] == 'MultyOptionsQuestion') & (df_questionnaires['is_linked'] == True)
-        list_mask = (df_questionnaires["type"] == 'TextListQuestion')
-        gps_mask = (df_questionnaires["type"] == 'GpsCoordinateQuestion')
-
-        # extract multi/list question lists from conditions
-        multi_unlinked_vars = df_questionnaires.loc[unlinked_mask, 'variable_name'].tolist()
-        multi_linked_vars = df_questionnaires.loc[linked_mask, 'variable_name'].tolist()
-        list_vars = df_questionnaires.loc[list_mask, 'variable_name'].tolist()
-        gps_vars = df_questionnaires.loc[gps_mask, 'variable_name'].tolist()
-
-    # Iterate over each file
-    all_dfs = []
-    for file_name in file_names:
+    unlinked_mask = (df_questionnaires["type"] == 'MultyOptionsQuestion') & (
+            df_questionnaires['is_linked'] == False)
+    linked_mask = (df_questionnaires["type"] == 'MultyOptionsQuestion') & (df_questionnaires['is_linked'] == True)
+    list_mask = (df_questionnaires["type"] == 'TextListQuestion')
+    gps_mask = (df_questionnaires["type"] == 'GpsCoordinateQuestion')
+
+    # extract multi/list question lists from conditions
+    return {
+        'unlinked': df_questionnaires.loc[unlinked_mask, 'variable_name'].tolist(),
+        'linked': df_questionnaires.loc[linked_mask, 'variable_name'].tolist(),
+        'list': df_questionnaires.loc[list_mask, 'variable_name'].tolist(),
+        'gps': df_questionnaires.loc[gps_mask, 'variable_name'].tolist(),
+    }
+
+
+def replace_stata_missing(df):
+    """
+    This function replaces the Stata missing values of a .dta file read with convert_missing=True, to match the
+    tabular export: '.a' is replaced with -999999999 and '.' with NaN. Other extended missing values are kept.
 
-        if file_name.endswith('.dta'):
-            df = pd.read_stata(os.path.join(survey_path, file_name), convert_categoricals=False, convert_missing=True)
-            df = df.where(df.astype(str) != '.a', -999999999)  # replace '.a' with -999999999 to match tabular export
-            df = df.where(df.astype(str) != '.', np.nan)  # replace '.' with np.nan
+    Only object columns can hold missing values, as read_stata converts the columns with missing values to object.
+    Numeric columns are left untouched instead of being converted to strings.
 
-        else:
-            df = pd.read_csv(os.path.join(survey_path, file_name), sep='\t')
+    Parameters:
+    df (DataFrame): The DataFrame read from the .dta file.
 
+    Returns:
+    df (DataFrame): The DataFrame with the missing values replaced.
+    """
+    for col in df.columns[df.dtypes == object]:
+        codes = df[col].map(lambda v: v.string if isinstance(v, StataMissingValue) else v)
+        df[col] = df[col].mask(codes == '.a', -999999999).mask(codes == '.', np.nan)
+    return df
 
-        # drop system-generated columns
-        df.drop(columns=[col for col in drop_list if col in df.columns], inplace=True)
 
-        # transform multi/list questions
-        if df_questionnaires.empty is False:
-            df = transform_multi(df, multi_unlinked_vars, 'unlinked')
-            df = transform_multi(df, multi_linked_vars, 'linked')
-            df = transform_multi(df, list_vars, 'list')
-            df = transform_multi(df, gps_vars, 'gps')
+def get_valid_value_mask(values):
+    """
+    This function flags the answered cells of the microdata, i.e. neither null nor an empty string. Lists, as
+    returned by transform_multi, are always valid.
 
-        # create roster_level from __id columns if on roster level, else '' if main questionnaire file
-        roster_ids = [col for col in df.columns if col.endswith("__id") and col != "interview__id"]
-        if roster_ids:
-            df['roster_level'] = df[roster_ids].apply(lambda row: ",".join(map(str, row)), axis=1)
-            df.drop(columns=roster_ids, inplace=True)
-        else:
-            df['roster_level'] = ''
+    Parameters:
+    values (ndarray): The values of the microdata columns.
 
-        id_vars = ['interview__id', 'roster_level']
-        value_vars = [col for col in df.columns if col not in id_vars]
-        df_long = df.melt(id_vars=id_vars, value_vars=value_vars, var_name='variable', value_name='value')
-        df_long['filename'] = file_name
+    Returns:
+    mask (ndarray): A boolean array of the shape of values, True where the value is valid.
+    """
+    mask = pd.notna(values)
+    if values.dtype == object:
+        mask &= (values != '')
+    return mask
 
-        all_dfs.append(df_long)
-    if len(all_dfs) > 0:
 
-        combined_df = pd.concat(all_dfs, ignore_index=True)
+def get_microdata_file(source, file_name, multi_variables, variables=None):
+    """
+    This function loads a single .dta or .tab microdata file and reshapes it into a long format.
+
+    Parameters:
+    source (source): The source giving access to the survey files.
+    file_name (str): The name of the microdata file.
+    multi_variables (dict): The variables to be transformed by transform_multi, as returned by get_multi_variables.
+    variables (set): The variables to be reshaped, as returned by get_required_variables, None to reshape all of them.
+
+    Returns:
+    df_long (DataFrame): The file in long format, with one row per interview__id, roster_level and variable.
+    """
+    # List of variables to exclude
+    drop_list = ['interview__key', 'sssys_irnd', 'has__errors', 'interview__status', 'assignment__id']
+
+    if file_name.endswith('.dta'):
+        with source.open(file_name) as file:
+            df = pd.read_stata(file, convert_categoricals=False, convert_missing=True)
+        df = replace_stata_missing(df)
+
+    else:
+        with source.open(file_name) as file:
+            df = pd.read_csv(file, sep='\t')
+
+    # drop system-generated columns
+    df.drop(columns=[col for col in drop_list if col in df.columns], inplace=True)
+
+    # transform multi/list questions
+    for transformation_type, variable_list in multi_variables.items():
+        df = transform_multi(df, variable_list, transformation_type)
+
+    # create roster_level from __id columns if on roster level, else '' if main questionnaire file
+    roster_ids = [col for col in df.columns if col.endswith("__id") and col != "interview__id"]
+    if roster_ids:
+        # join the id columns column-wise, converted to their common dtype as a row would be
+        ids = pd.DataFrame(df[roster_ids].to_numpy().astype(str), index=df.index)
+        df['roster_level'] = ids[0].str.cat([ids[i] for i in ids.columns[1:]], sep=',')
+        df.drop(columns=roster_ids, inplace=True)
+    else:
+        df['roster_level'] = ''
+
+    id_vars = ['interview__id', 'roster_level']
+    value_vars = [col for col in df.columns if col not in id_vars]
+    # Reshape only the valid cells of the required variables, in the same order as df.melt. The values keep the
+    # common dtype of all the columns, as df.melt would give them, so that their string form does not depend on
+    # the variables left out
+    dtype = df[value_vars].iloc[:0].to_numpy().dtype
+    if variables is not None:
+        value_vars = [col for col in value_vars if col in variables]
+    values = df[value_vars].to_numpy(dtype=dtype)
+    var_index, row_index = np.nonzero(get_valid_value_mask(values).T)
+    df_long = pd.DataFrame({'interview__id': df['interview__id'].to_numpy()[row_index],
+                            'roster_level': df['roster_level'].to_numpy()[row_index],
+                            'variable': np.array(value_vars, dtype=object)[var_index],
+                            'value': values[row_index, var_index]})
+    df_long['filename'] = file_name
+    return df_long
+
+
+def get_microdata(survey_path, df_questionnaires, survey_name, survey_version, file_names=None, workers=1,
+                  question_types=None):
+    """
+    This function loads microdata from .dta files in the specified directory and reshapes it into a long format. It also
+    applies a number of transformations to handle multi-options, list, and GPS coordinates questions.
+    Files are independent from each other and can be processed by a pool of threads.
+
+    Parameters:
+    survey_path (str or source): The directory path where the survey .dta files are located, or a source object.
+    df_questionnaires (DataFrame): DataFrame containing information about the questionnaire used for the survey.
+    file_names (list): The microdata files to be imported, defaults to all files returned by get_microdata_files.
+    workers (int): The number of files processed in parallel, None to use all the cores.
+    question_types (list): The question types whose microdata are needed, None to import all the variables.
+
+    Returns:
+    combined_df (DataFrame): The combined and processed DataFrame containing all survey responses. The answers are
+    stored as strings in value, the answers to numeric questions also as float in value_numeric. Each response is
+    linked to its questionnaire item by qnr_seq.
+    """
+    source = get_source(survey_path)
+    if file_names is None:
+        file_names = get_microdata_files(source, df_questionnaires)
+    multi_variables = get_multi_variables(df_questionnaires)
+    variables = get_required_variables(df_questionnaires, question_types)
+
+    # Iterate over each file, executor.map keeps the order of file_names so that the result does not depend on workers
+    if workers != 1 and len(file_names) > 1:
+        with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+            all_dfs = list(executor.map(partial(get_microdata_file, source, multi_variables=multi_variables,
+                                                variables=variables), file_names))
     else:
-        combined_df = pd.DataFrame()
+        all_dfs = [get_microdata_file(source, file_name, multi_variables, variables) for file_name in file_names]
 
-    # Drop column with null or empty string in value
-    # Function to check if the value is not an empty string or NaN
-    def is_valid(value):
-        if isinstance(value, list):
-            return True  # bool(value)  # Not an empty list
-        return value != '' and pd.notna(value)  # Not an empty string or NaN
+    if len(all_dfs) > 0:
 
-    # Keep rows where the 'value' column passes the is_valid check
-    combined_df = combined_df[combined_df['value'].apply(is_valid)]
+        combined_df = pd.concat(all_dfs, ignore_index=True)
+    else:
+        combined_df = pd.DataFrame(columns=['interview__id', 'roster_level', 'variable', 'value', 'filename'])
 
     combined_df = set_survey_name_version(combined_df, survey_name, survey_version)
     # Manage the case questionnaires are not available for the survey
     if df_questionnaires.empty is False:
-        roster_columns = [c for c in combined_df.columns if '__id' in c and c != 'interview__id']
-        combined_df = combined_df.merge(df_questionnaires, how='left',
-                                        left_on=['variable', 'survey_name', 'survey_version'],
-                                        right_on=['variable_name', 'survey_name', 'survey_version']).sort_values(
-            ['interview__id', 'qnr_seq'] + roster_columns)
+        # The questionnaire is the one of this survey version, look up the items by variable name instead of merging
+        # the whole long table
+        items = df_questionnaires.dropna(subset=['variable_name']).drop_duplicates('variable_name').set_index(
+            'variable_name')
+        combined_df['qnr_seq'] = combined_df['variable'].map(items['qnr_seq'])
+        combined_df['type'] = combined_df['variable'].map(items['type'])
+        combined_df.sort_values(['interview__id', 'qnr_seq'], inplace=True)
 
     combined_df.reset_index(drop=True, inplace=True)
 
     # Normalize columns
     combined_df.columns = [normalize_column_name(c) for c in combined_df.columns]
-    
+
+    # Parse the answers to numeric questions once, so that the numeric features do not parse the string values
+    numeric_mask = combined_df['type'] == 'NumericQuestion' if 'type' in combined_df.columns else False
+    combined_df['value_numeric'] = pd.to_numeric(combined_df['value'].where(numeric_mask),
+                                                 errors='coerce').astype('float64')
+    # Only the questionnaire key is kept, the other attributes are joined from the questionnaire when needed
+    combined_df.drop(columns=[col for col in ['type'] if col in combined_df.columns], inplace=True)
+
     # Set value column to string for type compatibility
     combined_df['value'] = combined_df['value'].astype(str)
     return combined_df
@@ -307,12 +736,55 @@ def process_json_structure(children, parent_group_title, counter, question_data)
     return counter
 
 
-def get_categories(directory):
+# Parsed questionnaires and categories of the current process, keyed by the hash of the file content. Compatible
+# versions of a questionnaire usually share identical files, which are then parsed only once.
+_QUESTIONNAIRE_CACHE = {}
+_CATEGORIES_CACHE = {}
+
+
+def get_content_hash(content):
+    """
+    This function returns the hash identifying the content of a file.
+    """
+    return hashlib.sha1(content).hexdigest()
+
+
+def read_categories_file(content, cache_dir=None):
+    """
+    This function parses a category Excel file, unless a file with the same content has already been parsed by the
+    current process or, if cache_dir is given, by a previous run.
+
+    Parameters:
+    content (bytes): The content of the Excel file.
+    cache_dir (str): The directory where the parsed categories are stored across runs, None to not store them.
+
+    Returns:
+    dict: A dictionary containing 'n_answers' and 'answer_sequence'.
+    """
+    key = get_content_hash(content)
+    if key not in _CATEGORIES_CACHE:
+        cache_file = os.path.join(cache_dir, f'{key}.json') if cache_dir else None
+        if cache_file and os.path.exists(cache_file):
+            with open(cache_file) as file:
+                _CATEGORIES_CACHE[key] = json.load(file)
+        else:
+            df = pd.read_excel(io.BytesIO(content))
+            _CATEGORIES_CACHE[key] = {'n_answers': df.shape[0], 'answer_sequence': df['id'].tolist()}
+            if cache_file:
+                os.makedirs(cache_dir, exist_ok=True)
+                with open(cache_file, 'w') as file:
+                    json.dump(_CATEGORIES_CACHE[key], file, default=_to_json_value)
+    return _CATEGORIES_CACHE[key]
+
+
+def get_categories(source, directory, cache_dir=None):
     """
     This function retrieves categories from Excel files within a directory.
 
     Parameters:
-    directory (str): The directory where the category Excel files are stored.
+    source (source): The source giving access to the survey files.
+    directory (str): The directory where the category Excel files are stored, relative to the source.
+    cache_dir (str): The directory where the parsed categories are stored across runs, None to not store them.
 
     Returns:
     dict: A dictionary containing category data. Each key represents a filename, and each value is another dictionary
@@ -321,51 +793,48 @@ def get_categories(directory):
 
     """
     categories = {}
-    files = [f for f in os.listdir(directory) if f.endswith('.xlsx') or f.endswith('.xls')]
+    files = [f for f in source.list_files(directory) if f.endswith('.xlsx') or f.endswith('.xls')]
     for file in files:
-        file_path = os.path.join(directory, file)
-        df = pd.read_excel(file_path)
-        n_answers = df.shape[0]
-        answer_sequence = df['id'].tolist()
-        categories[file] = {'n_answers': n_answers, 'answer_sequence': answer_sequence}
+        with source.open(f'{directory}/{file}') as excel_file:
+            categories[file] = read_categories_file(excel_file.read(), cache_dir)
     return categories
 
 
-def update_df_categories(row, categories):
+def update_df_categories(qnr_df, categories):
     """
-    This function updates a DataFrame row with categories information if applicable.
+    This function updates the questions with categories information if applicable.
 
     Parameters:
-    row (Series): The Questioner DataFrame row to be updated.
+    qnr_df (DataFrame): The Questioner DataFrame to be updated.
     categories (dict): A dictionary containing categories data, keys are 'CategoriesId'.
 
     Returns:
-    Series: The updated DataFrame row.
+    DataFrame: The updated DataFrame.
 
     """
-    if row['CategoriesId'] in categories:
-        row['n_answers'] = categories[row['CategoriesId']]['n_answers']
-        row['answer_sequence'] = categories[row['CategoriesId']]['answer_sequence']
-    return row
+    if 'CategoriesId' not in qnr_df.columns:
+        return qnr_df
+    categories_ids = qnr_df['CategoriesId'][qnr_df['CategoriesId'].isin(list(categories))]
+    qnr_df.loc[categories_ids.index, 'n_answers'] = categories_ids.map(lambda c: categories[c]['n_answers'])
+    qnr_df['answer_sequence'] = qnr_df['answer_sequence'].where(
+        ~qnr_df.index.isin(categories_ids.index), categories_ids.map(lambda c: categories[c]['answer_sequence']))
+    return qnr_df
 
 
-def get_questionaire(survey_path, survey_name, survey_version):
+def parse_questionnaire(content):
     """
-    This function loads and processes a questionnaire from a JSON file located at the specified path.
-    It also handles the categorization of the data.
+    This function parses the document.json of a questionnaire, unless a file with the same content has already been
+    parsed by the current process.
 
     Parameters:
-    survey_path (str): The path to the directory containing the questionnaire and categories data.
+    content (bytes): The content of the document.json file.
 
     Returns:
-    qnr_df (DataFrame): A processed DataFrame containing the questionnaire data.
-
+    qnr_df (DataFrame): A DataFrame containing the questionnaire items.
     """
-    qnr_df = pd.DataFrame()
-    questionaire_path = os.path.join(survey_path, 'Questionnaire/content/document.json')
-    if os.path.exists(questionaire_path):
-        with open(questionaire_path, encoding='utf8') as file:
-            json_data = json.load(file)
+    key = get_content_hash(content)
+    if key not in _QUESTIONNAIRE_CACHE:
+        json_data = json.loads(content)
 
         question_data = []
         question_counter = 0
@@ -384,11 +853,36 @@ def get_questionaire(survey_path, survey_name, survey_version):
         qmask = qnr_df['QuestionScope'] == 0
         qnr_df['question_sequence'] = qmask.cumsum()
         qnr_df.loc[~qmask, 'question_sequence'] = None
-    categories_path = os.path.join(survey_path, 'Questionnaire/content/Categories')
-    if os.path.exists(categories_path):
-        categories = get_categories(categories_path)
+        _QUESTIONNAIRE_CACHE[key] = qnr_df
+    # The callers add columns to the questionnaire, return a copy so that the cached one is left unchanged
+    return _QUESTIONNAIRE_CACHE[key].copy()
+
 
-        qnr_df = qnr_df.apply(lambda row: update_df_categories(row, categories), axis=1)
+def get_questionaire(survey_path, survey_name, survey_version, categories_cache=None):
+    """
+    This function loads and processes a questionnaire from a JSON file located at the specified path.
+    It also handles the categorization of the data.
+
+    Parameters:
+    survey_path (str or source): The path to the directory containing the questionnaire and categories data,
+    or a source object.
+    categories_cache (str): The directory where the parsed categories are stored across runs, None to not store them.
+
+    Returns:
+    qnr_df (DataFrame): A processed DataFrame containing the questionnaire data.
+
+    """
+    qnr_df = pd.DataFrame()
+    source = get_source(survey_path)
+    questionaire_path = f'{QUESTIONNAIRE_DIR}/document.json'
+    if source.exists(questionaire_path):
+        with source.open(questionaire_path) as file:
+            qnr_df = parse_questionnaire(file.read())
+    categories_path = f'{QUESTIONNAIRE_DIR}/Categories'
+    if source.list_files(categories_path):
+        categories = get_categories(source, categories_path, categories_cache)
+
+        qnr_df = update_df_categories(qnr_df, categories)
 
     qnr_df.reset_index(drop=True, inplace=True)
     # Normalize columns
@@ -397,31 +891,104 @@ def get_questionaire(survey_path, survey_name, survey_version):
     return qnr_df
 
 
-def get_paradata(survey_path, df_questionnaires, survey_name, survey_version):
+PARADATA_DTYPES = {'interview__id': str, 'order': 'int64', 'event': str, 'responsible': str,
+                   'timestamp_utc': str, 'tz_offset': str, 'parameters': str}
+PARADATA_COLUMNS = ['interview__id', 'order', 'event', 'responsible', 'role', 'timestamp_utc', 'tz_offset',
+                    'parameters']
+PARADATA_CHUNKSIZE = 500000
+# Events after which the interview is no longer considered as being interviewed
+PARADATA_SPLIT_EVENTS = ['RejectedBySupervisor', 'OpenedBySupervisor', 'OpenedByHQ', 'RejectedByHQ']
+
+
+def partition_parameters(values, method):
     """
-    This function loads and processes a paradata file from the provided path and merges it with the questionnaire dataframe.
-    The function also generates a date-time column from the timestamp and marks whether the answer has changed.
+    This function partitions string values around the first ('partition') or last ('rpartition') '||' separator.
+    str.partition returns a single column when no value is a string, e.g. in a chunk of parameterless events, the
+    three columns are always returned, so that the split does not depend on how the paradata are chunked.
+    """
+    parts = getattr(values.str, method)('||')
+    if parts.shape[1] < 3:
+        parts = parts.reindex(columns=[0, 1, 2]).astype(object)
+    return parts
+
+
+def split_parameters(parameters):
+    """
+    This function splits the paradata parameters column into param, answer and roster_level.
+    The column is split first from the left, then from the right to avoid potential data entry issues.
 
     Parameters:
-    para_path (str): A string path to the paradata .csv file.
-    df_questionnaires (DataFrame): A Pandas DataFrame containing the questionnaire data.
+    parameters (Series): The parameters column of the paradata, in the form 'param||answer||roster_level'.
 
     Returns:
-    df_para (DataFrame): A processed DataFrame containing the merged data from the paradata file and the questionnaire DataFrame.
+    param, answer, roster_level (Series): The split columns, NaN where the separator is missing.
+    """
+    left = partition_parameters(parameters, 'partition')
+    param = left[0]
+    answer = left[2].where(left[1] == '||')
+
+    right = partition_parameters(answer, 'rpartition')
+    has_roster = right[1] == '||'
+    roster_level = right[2].where(has_roster)
+    answer = right[0].where(has_roster, answer)
+    return param, answer, roster_level
 
+
+def parse_tz_offset(tz_offset):
     """
-    para_path = os.path.join(survey_path, 'paradata.tab')
-    df_para = pd.read_csv(para_path, delimiter='\t')
+    This function converts the paradata tz_offset column, in the form '[-]HH:MM', to timedelta.
 
-    # split the parameter column, first from the left, then from the right to avoid potential data entry issues
-    df_para[['param', 'answer']] = df_para['parameters'].str.split('\|\|', n=1, expand=True)
-    df_para[['answer', 'roster_level']] = df_para['answer'].str.rsplit('||', n=1, expand=True)
+    Parameters:
+    tz_offset (Series): The tz_offset column of the paradata.
 
-    #    df_para['roster_level'] = df_para['roster_level'].str.replace("|","")  # if yes/no questions are answered with yes for the first time, "|" will appear in roster
+    Returns:
+    Series: The timezone offsets as timedelta, NaT if the offset cannot be parsed.
+    """
+    parts = tz_offset.str.extract(r'^\s*([+-]?)(\d+):(\d+)')
+    minutes = parts[1].astype(float) * 60 + parts[2].astype(float)
+    minutes = minutes.where(parts[0] != '-', -minutes)
+    return pd.to_timedelta(minutes, unit='m')
+
+
+def get_interviewing_mask(df_para, split_interviews):
+    """
+    This function flags the paradata events recorded while interviewing, i.e. prior to the first Supervisor/HQ
+    interaction with the interview, in the order of the paradata file.
+
+    Parameters:
+    df_para (DataFrame): A chunk of the paradata, in the order of the file.
+    split_interviews (set): The interviews that had a Supervisor/HQ interaction in the previous chunks, updated in
+    place with the interviews of this chunk.
+
+    Returns:
+    Series: True for the events recorded while interviewing.
+    """
+    flag = df_para['event'].isin(PARADATA_SPLIT_EVENTS)
+    interviewing = (flag.groupby(df_para['interview__id'], observed=True).cumsum() == 0) & \
+                   ~df_para['interview__id'].isin(split_interviews)
+    split_interviews.update(df_para.loc[flag, 'interview__id'].unique())
+    return interviewing
+
+
+def process_paradata_chunk(df_para, df_questionnaires, survey_name, survey_version):
+    """
+    This function parses a chunk of the raw paradata and merges it with the questionnaire dataframe.
+    Only the questionnaire key qnr_seq is added to the events.
+
+    Parameters:
+    df_para (DataFrame): A chunk of the raw paradata file.
+    df_questionnaires (DataFrame): A Pandas DataFrame containing the questionnaire data.
+    survey_name (str): The name of the survey.
+    survey_version (str): The version of the survey.
+
+    Returns:
+    df_para (DataFrame): The processed chunk.
+    """
+    df_para['param'], df_para['answer'], df_para['roster_level'] = split_parameters(df_para['parameters'])
 
     df_para['timestamp_utc'] = pd.to_datetime(df_para['timestamp_utc'])  # generate date-time, TZ not yet considered
 
-    df_para['tz_offset'] = pd.to_timedelta(df_para['tz_offset'].str.replace(':', ' hours ') + ' minutes')
+    df_para['tz_offset'] = parse_tz_offset(df_para['tz_offset'])
 
     # Adjust the date column by the timezone offset
     df_para['timestamp_local'] = df_para['timestamp_utc'] + df_para['tz_offset']
@@ -429,16 +996,79 @@ def get_paradata(survey_path, df_questionnaires, survey_name, survey_version):
     df_para = set_survey_name_version(df_para, survey_name, survey_version)
 
     if df_questionnaires.empty is False:
-        q_columns = ['qnr_seq', 'variable_name', "type", 'question_type', 'answers', 'question_scope',
-                     'yes_no_view', 'is_filtered_combobox',
-                     'is_integer', 'cascade_from_question_id', 'answer_sequence', 'n_answers', 'question_sequence',
-                     'survey_name', 'survey_version']
-        df_para = df_para.merge(df_questionnaires[q_columns], how='left',
+        df_para = df_para.merge(df_questionnaires[['variable_name'] + QUESTIONNAIRE_KEY], how='left',
                                 left_on=['param', 'survey_name', 'survey_version'],
                                 right_on=['variable_name', 'survey_name', 'survey_version'])
+        df_para.drop(columns='variable_name', inplace=True)
+    return df_para
+
+
+def get_paradata(survey_path, df_questionnaires, survey_name, survey_version, chunksize=None, df_previous=None,
+                 interviewing_only=False):
+    """
+    This function loads and processes a paradata file from the provided path and merges it with the questionnaire dataframe.
+    The function also generates a date-time column from the timestamp and marks whether the answer has changed.
+    The file is read in chunks of bounded size, each of them parsed independently, so that the memory
+    required by the parsing does not depend on the size of the paradata file.
+
+    If interviewing_only is set, the events recorded by other roles than the interviewer or after the first
+    Supervisor/HQ interaction are dropped while reading, before being parsed.
+
+    If the paradata processed by a previous import are given, only the events whose interview__id and order are
+    not among them are parsed. The previous events still in the file are reused and the merged log keeps the
+    order of the file, as if it had been parsed entirely.
+
+    Parameters:
+    survey_path (str or source): The directory path where the paradata.tab file is located, or a source object.
+    df_questionnaires (DataFrame): A Pandas DataFrame containing the questionnaire data.
+    survey_name (str): The name of the survey.
+    survey_version (str): The version of the survey.
+    chunksize (int): The number of rows to be parsed at once, defaults to PARADATA_CHUNKSIZE.
+    df_previous (DataFrame): The paradata processed by a previous import of the same survey version.
+    interviewing_only (bool): Whether to keep only the events recorded by the interviewer while interviewing.
+
+    Returns:
+    df_para (DataFrame): A processed DataFrame containing the merged data from the paradata file and the questionnaire DataFrame.
+
+    """
+    source = get_source(survey_path)
+    key_columns = ['interview__id', 'order']
+    if df_previous is not None:
+        parsed_keys = pd.MultiIndex.from_frame(df_previous[key_columns])
+    chunks, keys = [], []
+    position = 0
+    split_interviews = set()
+    with source.open('paradata.tab') as para_file:
+        reader = pd.read_csv(para_file, delimiter='\t', usecols=PARADATA_COLUMNS, dtype=PARADATA_DTYPES,
+                             chunksize=chunksize or PARADATA_CHUNKSIZE)
+        for df_para in reader:
+            if interviewing_only:
+                df_para = df_para[get_interviewing_mask(df_para, split_interviews) & (df_para['role'] == 1)].copy()
+                # The filter can remove all the events of the chunk
+                if df_para.empty:
+                    continue
+            if df_previous is not None:
+                # Keep track of the position of the events in the file, the merge of the chunk resets the index
+                df_para['raw_position'] = np.arange(position, position + len(df_para))
+                position += len(df_para)
+                keys.append(df_para[key_columns + ['raw_position']])
+                df_para = df_para[~pd.MultiIndex.from_frame(df_para[key_columns]).isin(parsed_keys)].copy()
+            if df_para.empty:
+                continue
+            chunks.append(process_paradata_chunk(df_para, df_questionnaires, survey_name, survey_version))
+
+    df_para = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
 
     # Normalize column names
     df_para.columns = [normalize_column_name(c) for c in df_para.columns]
+
+    if df_previous is not None:
+        # Drop the previous events that are no longer in the file, e.g. of deleted interviews
+        keys = pd.concat(keys, ignore_index=True).drop_duplicates(key_columns)
+        df_previous = df_previous.merge(keys, on=key_columns, how='inner')
+        df_para = pd.concat([df_previous, df_para] if chunks else [df_previous], ignore_index=True)
+        df_para = df_para.sort_values('raw_position', kind='stable').drop(columns='raw_position')
+        df_para.reset_index(drop=True, inplace=True)
     return df_para
 
 
@@ -459,6 +1089,63 @@ def set_survey_name_version(df, survey_name, survey_version):
     return df
 
 
+def import_survey_version(survey_path, processed_data_path, survey_name, survey_version, load_cache=False,
+                          fingerprint=None, save_to_disk=False, columns=None, paradata_chunksize=None,
+                          question_types=None, microdata_workers=1, incremental_paradata=False,
+                          interviewing_only=False, categories_cache=None):
+    """
+    This function imports a single survey version, either from the processed data or from the survey files.
+    It is defined at module level so that it can be run in a separate process.
+
+    Parameters:
+    survey_path (str or source): The directory path where the survey files are located, or a source object.
+    processed_data_path (str): The directory path where the processed data is stored.
+    survey_name (str): The name of the survey.
+    survey_version (str): The version of the survey.
+    load_cache (bool): Whether to load the processed data instead of importing the survey files.
+    fingerprint (dict): The fingerprint of the export files, stored with the processed data.
+    save_to_disk (bool): Whether to save the imported data as processed data.
+    columns (dict): Optional mapping from frame name ('paradata', 'questionnaire', 'microdata') to the columns to return.
+    paradata_chunksize (int): The number of paradata rows to be parsed at once.
+    question_types (list): The question types whose microdata are needed, None to import all of them.
+    microdata_workers (int): The number of microdata files processed in parallel.
+    incremental_paradata (bool): Whether to parse only the paradata events added since the previous import.
+    interviewing_only (bool): Whether to keep only the paradata events recorded by the interviewer while interviewing.
+    categories_cache (str): The directory where the parsed categories are stored across runs, None to not store them.
+
+    Returns:
+    df_paradata, df_questionnaires, df_microdata (DataFrame): The paradata, questionnaire and microdata of the version.
+    """
+    print(f"IMPORTING: {survey_name} with version {survey_version}. ")
+    if load_cache:
+        df_paradata, df_questionnaires, df_microdata = load_dataframes(processed_data_path, columns)
+    else:
+        previous_paradata = load_previous_paradata(processed_data_path, fingerprint, interviewing_only) \
+            if incremental_paradata else None
+        df_paradata, df_questionnaires, df_microdata = get_data(survey_path, survey_name, survey_version,
+                                                                paradata_chunksize=paradata_chunksize,
+                                                                question_types=question_types,
+                                                                microdata_workers=microdata_workers,
+                                                                previous_paradata=previous_paradata,
+                                                                interviewing_only=interviewing_only,
+                                                                categories_cache=categories_cache)
+        if save_to_disk:
+            save_dataframes(df_paradata, df_questionnaires, df_microdata, processed_data_path,
+                            metadata={'question_types': question_types, 'fingerprint': fingerprint,
+                                      'interviewing_only': interviewing_only})
+        if columns is not None:
+            df_paradata, df_questionnaires, df_microdata = [
+                df[[col for col in columns[name] if col in df.columns]] if name in columns else df
+                for name, df in zip(CACHE_FRAMES, [df_paradata, df_questionnaires, df_microdata])]
+    print(f"{survey_name} with version {survey_version} loaded. "
+          f"\n"
+          f"Paradata shape: {df_paradata.shape} "
+          f"Questionnaires shape: {df_questionnaires.shape} "
+          f"Microdata shape: {df_microdata.shape} "
+          )
+    return df_paradata, df_questionnaires, df_microdata
+
+
 class ImportManager:
     """
     This class manages the different paths defined in the configuration file.
@@ -470,7 +1157,12 @@ class ImportManager:
     Methods:
     get_files(): Creates a dictionary of zip files from the surveys defined in config.
     get_survey_version(): Filters the file dictionary based on the surveys specified in the config.
+    get_required_features(): Returns the names of the features computed.
     extract(overwrite_dir): Extracts the contents of the zip files to a target directory.
+    get_microdata_manifest(source, survey_name, survey_version): Returns the microdata files used by the features.
+    get_zip_paths(files): Returns the paths of the export zip files of a survey version.
+    get_zip_source(files): Returns a source reading the files of a survey version straight from the zip files.
+    is_cache_valid(processed_data_path, fingerprint): Checks whether the processed data can be reused.
     get_dataframes(save_to_disk, reload): Returns dataframes of the paradata, questionnaires, and microdata.
     """
 
@@ -484,9 +1176,22 @@ class ImportManager:
         # Extract attributes
         self.config = config
         self.file_dict = {}
+        # Question types whose microdata are used by the enabled features, None if all are used
+        self.question_types = get_required_question_types(self.get_required_features())
+        # Whether the paradata are filtered to the events recorded by the interviewer while interviewing
+        self.interviewing_only = config['environment'].get('paradata_interviewing_only', False)
+        # Directory where the parsed category files are stored, shared by the versions and the runs
+        self.categories_cache = os.path.join(config['environment']['data']['processed'], 'categories') \
+            if config['environment'].get('cache_categories', False) else None
         self.get_survey_version()
 
 
+    def get_required_features(self):
+        """
+        Returns the names of the features computed, as in the configuration file, i.e. the enabled ones.
+        """
+        return [feature for feature, params in self.config.get('features', {}).items() if params['use']]
+
     def get_files(self):
         """
         Get a dictionary with all zip files from the surveys defined in the config.
@@ -540,11 +1245,14 @@ class ImportManager:
     def extract(self, overwrite_dir=False):
         """
         Extracts the contents of the zip files to a target directory.
+        Only paradata.tab, the questionnaire and the microdata files used by the enabled features are extracted.
+        Unless reload is set, versions whose processed data have been built from the same export files are skipped.
 
         Parameters:
         overwrite_dir: A boolean indicating whether to overwrite the existing directory.
         """
-        if self.config['environment']['extract']:
+        # Nothing to extract if the data are read straight from the export files
+        if self.config['environment']['extract'] and not self.config['environment'].get('read_from_zip'):
             for survey_name, survey in self.file_dict.items():
                 target_dir = os.path.join(self.config['environment']['data']['raw'], survey_name)
                 if overwrite_dir and os.path.exists(target_dir):
@@ -557,6 +1265,11 @@ class ImportManager:
                 for survey_version, files in survey.items():
                     file_path = files['file_path']
                     dest_path = os.path.join(target_dir, survey_version)
+                    # Skip the versions whose export files did not change since they were processed
+                    if not overwrite_dir and self.config['environment']['reload'] is False and self.is_cache_valid(
+                            os.path.join(dest_path, 'processed_data'),
+                            get_export_fingerprint(self.get_zip_paths(files))):
+                        continue
                     if overwrite_dir and os.path.exists(dest_path):
                         shutil.rmtree(dest_path)
 
@@ -570,7 +1283,8 @@ class ImportManager:
                         try:
                             paradata_path = os.path.join(file_path, paradata_file)
                             with zipfile.ZipFile(paradata_path, 'r') as zip_ref:
-                                zip_ref.extractall(dest_path)
+                                zip_ref.extractall(dest_path, members=[name for name in zip_ref.namelist()
+                                                                       if name == 'paradata.tab'])
                         except ValueError:
                             print(f"WARNING: survey {survey_name} with version {survey_version} has not paradata file")
                             shutil.rmtree(dest_path)
@@ -578,8 +1292,11 @@ class ImportManager:
                     if files.get('Tabular'):
                         try:
                             microdata_file = os.path.join(file_path, files['Tabular'])
+                            members = [QUESTIONNAIRE_ZIP] + self.get_microdata_manifest(
+                                ZipSource([microdata_file]), survey_name, survey_version)
                             with zipfile.ZipFile(microdata_file, 'r') as zip_ref:
-                                zip_ref.extractall(dest_path)
+                                zip_ref.extractall(dest_path, members=[name for name in zip_ref.namelist()
+                                                                       if name in members])
                             content_zip_path = os.path.join(dest_path, "Questionnaire", "content.zip")
                             content_dir = os.path.join(dest_path, "Questionnaire", "content")
                             with zipfile.ZipFile(content_zip_path, 'r') as zip_ref:
@@ -588,43 +1305,106 @@ class ImportManager:
                             print(f"WARNING: survey {survey_name} with version {survey_version} has missing files")
                             shutil.rmtree(dest_path)
 
-    def get_dataframes(self, save_to_disk=True, reload=False):
+    def get_microdata_manifest(self, source, survey_name, survey_version):
+        """
+        Returns the microdata files of a survey version that are used by the enabled features.
+
+        Parameters:
+        source: The source giving access to the survey files.
+        survey_name: The name of the survey.
+        survey_version: The version of the survey.
+        """
+        df_questionnaires = pd.DataFrame()
+        if self.question_types is not None:
+            df_questionnaires = get_questionaire(source, survey_name, survey_version, self.categories_cache)
+        return get_microdata_files(source, df_questionnaires, self.question_types)
+
+    @staticmethod
+    def get_zip_paths(files):
+        """
+        Returns the paths of the Paradata and Tabular export files of a survey version.
+
+        Parameters:
+        files: The dictionary of the export files of the survey version.
+        """
+        return [os.path.join(files['file_path'], files[file_format]) for file_format in ['Paradata', 'Tabular']
+                if files.get(file_format)]
+
+    @staticmethod
+    def get_zip_source(files):
+        """
+        Returns a ZipSource reading the files of a survey version straight from its export files.
+
+        Parameters:
+        files: The dictionary of the export files of the survey version.
+        """
+        return ZipSource(ImportManager.get_zip_paths(files))
+
+    def is_cache_valid(self, processed_data_path, fingerprint=None):
+        """
+        Returns True if the processed data can be reused, i.e. the cache has been written by the current version
+        from the same export files, contains the microdata of all the question types needed by the enabled
+        features and contains all the paradata events needed.
+
+        Parameters:
+        processed_data_path: The directory path where the processed data is stored.
+        fingerprint: The fingerprint of the current export files, None to skip the check.
+        """
+        cache_info = get_cache_info(processed_data_path)
+        if cache_info is None:
+            return False
+        if fingerprint is not None and cache_info.get('fingerprint') != fingerprint:
+            return False
+        if cache_info.get('interviewing_only', False) and not self.interviewing_only:
+            return False
+        cached_types = cache_info.get('question_types')
+        if cached_types is None:
+            return True
+        return self.question_types is not None and set(self.question_types) <= set(cached_types)
+
+    def get_dataframes(self, save_to_disk=True, reload=False, columns=None, encode=True):
         """
         Returns dataframes of the paradata, questionnaires, and microdata.
 
         Parameters:
         save_to_disk: A boolean indicating whether to save the dataframes to disk.
         reload: A boolean indicating whether to reload the data.
+        columns: Optional mapping from frame name ('paradata', 'questionnaire', 'microdata') to the columns to return.
+        encode: A boolean indicating whether to encode the string keys as categoricals, see encode_categorical_columns.
 
         Returns:
         df_paradata, df_questionnaires, df_microdata: Dataframes containing the paradata, questionnaires, and microdata from the different surveys defined in the config.
         """
-        # code omitted for brevity
-        dfs_paradata = []
-        dfs_questionnaires = []
-        dfs_microdata = []
+        import_workers = self.config['environment'].get('import_workers', 1)
+        jobs = []
         for survey_name, survey in self.file_dict.items():
             target_dir = os.path.join(self.config['environment']['data']['raw'], survey_name)
 
             for survey_version, files in survey.items():
-                print(f"IMPORTING: {survey_name} with version {survey_version}. ")
                 survey_path = os.path.join(target_dir, survey_version)
                 processed_data_path = os.path.join(survey_path, 'processed_data')
-                if reload is False and os.path.isdir(processed_data_path):
-                    df_paradata, df_questionnaires, df_microdata = load_dataframes(processed_data_path)
-                else:
-                    df_paradata, df_questionnaires, df_microdata = get_data(survey_path, survey_name, survey_version)
-                    if save_to_disk:
-                        save_dataframes(df_paradata, df_questionnaires, df_microdata, processed_data_path)
-                print(f"{survey_name} with version {survey_version} loaded. "
-                      f"\n"
-                      f"Paradata shape: {df_paradata.shape} "
-                      f"Questionnaires shape: {df_questionnaires.shape} "
-                      f"Microdata shape: {df_microdata.shape} "
-                      )
-                dfs_paradata.append(df_paradata)
-                dfs_questionnaires.append(df_questionnaires)
-                dfs_microdata.append(df_microdata)
+                if self.config['environment'].get('read_from_zip'):
+                    survey_path = self.get_zip_source(files)
+                fingerprint = get_export_fingerprint(self.get_zip_paths(files))
+                load_cache = reload is False and self.is_cache_valid(processed_data_path, fingerprint)
+                jobs.append((survey_path, processed_data_path, survey_name, survey_version, load_cache, fingerprint))
+
+        import_options = {'save_to_disk': save_to_disk, 'columns': columns,
+                          'paradata_chunksize': self.config['environment'].get('paradata_chunksize'),
+                          'question_types': self.question_types,
+                          'microdata_workers': self.config['environment'].get('microdata_workers', 1),
+                          'incremental_paradata': self.config['environment'].get('incremental_paradata', False),
+                          'interviewing_only': self.interviewing_only,
+                          'categories_cache': self.categories_cache}
+        if import_workers != 1 and len(jobs) > 1:
+            # Versions are independent, import them in separate processes.
+            # executor.map returns the results in the order of the jobs, independently of the completion order
+            with ProcessPoolExecutor(max_workers=min(import_workers or os.cpu_count(), len(jobs))) as executor:
+                results = list(executor.map(partial(import_survey_version, **import_options), *zip(*jobs)))
+        else:
+            results = [import_survey_version(*job, **import_options) for job in jobs]
+
+        dfs_paradata, dfs_questionnaires, dfs_microdata = zip(*results)
 
         # create unique dataframe with all surveys
         dfs_paradata = pd.concat(dfs_paradata)
@@ -635,4 +1415,84 @@ class ImportManager:
         dfs_questionnaires.reset_index(drop=True, inplace=True)
         dfs_microdata.reset_index(drop=True, inplace=True)
 
+        if encode:
+            encode_categorical_columns([dfs_paradata, dfs_questionnaires, dfs_microdata])
+
         return dfs_paradata, dfs_questionnaires, dfs_microdata
+
+
+class Dataset:
+    """
+    This class holds the paradata, questionnaire and microdata returned by ImportManager.get_dataframes, so that the
+    export files are imported once and all the accessors share the same frames.
+
+    Attributes:
+    import_manager: The ImportManager importing the frames.
+    save_to_disk: A boolean indicating whether to save the dataframes to disk when they are imported.
+    reload: A boolean indicating whether to reload the data when they are imported.
+    columns: Optional mapping from frame name to the columns used, the other columns are not read from the
+    processed data.
+
+    Methods:
+    load(): Imports the frames, unless they are already loaded.
+    evict(names): Releases the frames that are no longer needed, they are imported again if accessed.
+    """
+
+    def __init__(self, import_manager, save_to_disk=True, reload=False, columns=None):
+        """
+        The constructor for the Dataset class. Nothing is imported until a frame is accessed or load is called.
+
+        Parameters:
+        import_manager: The ImportManager importing the frames.
+        save_to_disk: A boolean indicating whether to save the dataframes to disk.
+        reload: A boolean indicating whether to reload the data.
+        columns: Optional mapping from frame name ('paradata', 'questionnaire', 'microdata') to the columns used.
+        """
+        self.import_manager = import_manager
+        self.save_to_disk = save_to_disk
+        self.reload = reload
+        self.columns = columns
+        self._frames = {}
+
+    def load(self):
+        """
+        Imports the frames, unless they are all already loaded.
+        """
+        missing = [name for name in CACHE_FRAMES if name not in self._frames]
+        if missing:
+            frames = self.import_manager.get_dataframes(save_to_disk=self.save_to_disk, reload=self.reload,
+                                                        columns=self.columns, encode=False)
+            # Only the frames missing are encoded, with the categories of the frames kept, e.g. after an eviction
+            frames = {name: df for name, df in zip(CACHE_FRAMES, frames) if name in missing}
+            encode_categorical_columns(list(frames.values()), reference_dfs=list(self._frames.values()))
+            self._frames.update(frames)
+            # The data are imported, later imports after an eviction can use the processed data if saved
+            self.reload = False
+        return self
+
+    def evict(self, names=None):
+        """
+        Releases the frames that are no longer needed.
+
+        Parameters:
+        names: The names of the frames to be released ('paradata', 'questionnaire', 'microdata'), None for all.
+        """
+        for name in CACHE_FRAMES if names is None else names:
+            self._frames.pop(name, None)
+
+    def _get(self, name):
+        if name not in self._frames:
+            self.load()
+        return self._frames[name]
+
+    @property
+    def paradata(self):
+        return self._get('paradata')
+
+    @property
+    def questionnaire(self):
+        return self._get('questionnaire')
+
+    @property
+    def microdata(self):
+        return self._get('microdata')
@@ -29,7 +29,7 @@ class ItemFeatureProcessing(FeatureProcessing):
     def filter_variable_name_by_frequency(df, feature_name, frequency=100, min_unique_values=3):
         # Select only those variables that have at least 'min_unique_values' distinct values and more than one
         # 'frequency' records
-        valid_variables = df.groupby('variable_name').filter(lambda group:
+        valid_variables = df.groupby('variable_name', observed=True).filter(lambda group:
                                                              len(group[feature_name].unique()) >= min_unique_values
                                                              and len(group) > frequency)
         # Get the unique variable names that meet the conditions
@@ -49,11 +49,11 @@ class ItemFeatureProcessing(FeatureProcessing):
 
     def get_clean_pivot_table(self, feature_name, remove_low_freq_col=True, filter_conditions=None, threshold=0.2):
         index_col = ['interview__id', 'roster_level', 'responsible']
-        data = self.df_item
+        data = self._df_item
         if filter_conditions is not None:
             data = data.loc[filter_conditions]
         data = pd.pivot_table(data=data, index=index_col, columns='variable_name',
-                              values=feature_name, fill_value=np.NAN)
+                              values=feature_name, fill_value=np.NAN, observed=True)
         data = data.reset_index()
         # Define again index_col after pivoting in case of some column missing
         if data.columns.nlevels > 1:
@@ -151,7 +151,7 @@ class ItemFeatureProcessing(FeatureProcessing):
     def make_score__sequence_jump(self):
         feature_name = 'f__sequence_jump'
         score_name = self.rename_feature(feature_name)
-        df = self.df_item[~pd.isnull(self.df_item[feature_name])].copy()
+        df = self._df_item[~pd.isnull(self._df_item[feature_name])].copy()
         # Select only those variables that have at least three distinct values and more than one hundred records
         valid_variables = self.filter_variable_name_by_frequency(df, feature_name, frequency=100, min_unique_values=3)
         df[score_name] = 0
@@ -167,7 +167,7 @@ class ItemFeatureProcessing(FeatureProcessing):
 
         feature_name = 'f__first_decimal'
         score_name = self.rename_feature(feature_name)
-        df = self.df_item[~pd.isnull(self.df_item[feature_name])].copy()
+        df = self._df_item[~pd.isnull(self._df_item[feature_name])].copy()
         # Select only those variables that have at least three distinct values and more than one hundred records
         valid_variables = self.filter_variable_name_by_frequency(df, feature_name, frequency=100, min_unique_values=3)
         df[score_name] = 0
@@ -184,7 +184,7 @@ class ItemFeatureProcessing(FeatureProcessing):
         # ECOD is a parameter-free, highly interpretable outlier detection algorithm based on empirical CDF functions
         feature_name = 'f__answer_hour_set'
         score_name = self.rename_feature(feature_name)
-        df = self.df_item[~pd.isnull(self.df_item[feature_name])]#.copy()
+        df = self._df_item[~pd.isnull(self._df_item[feature_name])]#.copy()
 
         # Sorting the DataFrame based on the 'frequency' answer_hour_set in descending order
         sorted_hours = df[feature_name].value_counts().index
@@ -206,7 +206,7 @@ class ItemFeatureProcessing(FeatureProcessing):
     def make_score__answer_changed(self):
         feature_name = 'f__answer_changed'
         score_name = self.rename_feature(feature_name)
-        df = self.df_item[~pd.isnull(self.df_item[feature_name])]#.copy()
+        df = self._df_item[~pd.isnull(self._df_item[feature_name])]#.copy()
         # Select only those variables that have at least 1 distinct values and more than one hundred records
         valid_variables = self.filter_variable_name_by_frequency(df, feature_name, frequency=100, min_unique_values=1)
         df[score_name] = 0
@@ -240,14 +240,14 @@ class ItemFeatureProcessing(FeatureProcessing):
         feature_name = 'f__answer_position'
         score_name = self.rename_feature(feature_name)
 
-        df = self.df_item[~pd.isnull(self.df_item[feature_name])].copy()
+        df = self._df_item[~pd.isnull(self._df_item[feature_name])].copy()
         # Select only those variables that have at least three distinct values and more than one hundred records
         valid_variables = self.filter_variable_name_by_frequency(df, feature_name, frequency=100, min_unique_values=3)
         df[score_name] = 0
         for var in valid_variables:
             mask = (df['variable_name'] == var)
             unique_values = df[mask][feature_name].nunique()
-            entropy_df = df[mask].groupby('responsible')[feature_name].apply(calculate_entropy,
+            entropy_df = df[mask].groupby('responsible', observed=True)[feature_name].apply(calculate_entropy,
                                                                              unique_values=unique_values,
                                                                              min_record_sample=10)
             entropy_df = entropy_df.reset_index()
@@ -261,13 +261,14 @@ class ItemFeatureProcessing(FeatureProcessing):
                 median_value = entropy_df[feature_name].median()
                 entropy_df[score_name] = entropy_df[feature_name].apply(
                     lambda x: 1 if x < median_value - 50 / 100 * median_value else 0)
-                df.loc[mask, score_name] = df[mask]['responsible'].map(entropy_df.set_index('responsible')[score_name])
+                df.loc[mask, score_name] = map_categorical_column(
+                    df.loc[mask, 'responsible'], entropy_df.set_index('responsible')[score_name])
         return df
 
     def make_score__answer_selected(self):
         feature_name = 'f__answer_selected'
         score_name = self.rename_feature(feature_name)
-        df = self.df_item[~pd.isnull(self.df_item[feature_name])].copy()
+        df = self._df_item[~pd.isnull(self._df_item[feature_name])].copy()
         # Select only those variables that have at least three distinct values and more than one hundred records
         valid_variables = self.filter_variable_name_by_frequency(df, feature_name, frequency=100, min_unique_values=3)
         df[score_name] = 0
@@ -294,7 +295,7 @@ class ItemFeatureProcessing(FeatureProcessing):
     def make_score__answer_duration(self):
         feature_name = 'f__answer_duration'
         score_name = self.rename_feature(feature_name)
-        df = self.df_item[~pd.isnull(self.df_item[feature_name])]#.copy()
+        df = self._df_item[~pd.isnull(self._df_item[feature_name])]#.copy()
         # Select only those variables that have at least three distinct values and more than one hundred records
         valid_variables = self.filter_variable_name_by_frequency(df, feature_name, frequency=100, min_unique_values=3)
 
@@ -330,12 +331,12 @@ class ItemFeatureProcessing(FeatureProcessing):
         feature_name = 'f__single_question'
         score_name = self.rename_feature(feature_name)
 
-        single_question_mask = ((self.df_item['type'] == 'SingleQuestion')
-                                & (self.df_item['n_answers'] > 1)
-                                & (self.df_item['is_filtered_combobox'] == False)
-                                & (pd.isnull(self.df_item['cascade_from_question_id'])))
+        single_question_mask = ((self._df_item['type'] == 'SingleQuestion')
+                                & (self._df_item['n_answers'] > 1)
+                                & (self._df_item['is_filtered_combobox'] == False)
+                                & (pd.isnull(self._df_item['cascade_from_question_id'])))
 
-        df = self.df_item[single_question_mask].copy()
+        df = self._df_item[single_question_mask].copy()
         # Select only those variables that have at least three distinct values and more than one hundred records
 
         variables = self.filter_variable_name_by_frequency(df, 'value', frequency=100, min_unique_values=3)
@@ -343,7 +344,8 @@ class ItemFeatureProcessing(FeatureProcessing):
         for var in variables:
             mask = (df['variable_name'] == var)
             unique_values = df[mask]['value'].nunique()
-            entropy_df = df[mask].groupby('responsible')['value'].apply(calculate_entropy, unique_values=unique_values)
+            entropy_df = df[mask].groupby('responsible', observed=True)['value'].apply(calculate_entropy,
+                                                                                       unique_values=unique_values)
             entropy_df = entropy_df.reset_index()
             entropy_df = entropy_df[~pd.isnull(entropy_df['value'])]
 
@@ -355,7 +357,8 @@ class ItemFeatureProcessing(FeatureProcessing):
                 median_value = entropy_df['value'].median()
                 entropy_df[score_name] = entropy_df['value'].apply(
                     lambda x: 1 if x < median_value - 50 / 100 * median_value else 0)
-                df.loc[mask, score_name] = df[mask]['responsible'].map(entropy_df.set_index('responsible')[score_name])
+                df.loc[mask, score_name] = map_categorical_column(
+                    df.loc[mask, 'responsible'], entropy_df.set_index('responsible')[score_name])
 
         return df
 
@@ -365,11 +368,11 @@ class ItemFeatureProcessing(FeatureProcessing):
 
         score_name = self.rename_feature(feature_name)
 
-        multi_question_mask = (self.df_item['type'] == 'MultyOptionsQuestion').copy()
+        multi_question_mask = (self._df_item['type'] == 'MultyOptionsQuestion').copy()
 
-        df = self.df_item[multi_question_mask].copy()
+        df = self._df_item[multi_question_mask].copy()
         # Select only those variables that have at least three distinct values and more than one hundred records
-        valid_variables = df.groupby('variable_name').filter(lambda x: len(x) >= 100)
+        valid_variables = df.groupby('variable_name', observed=True).filter(lambda x: len(x) >= 100)
         # Get the unique variable names that meet the conditions
         variables = valid_variables['variable_name'].unique()
 
@@ -377,7 +380,7 @@ class ItemFeatureProcessing(FeatureProcessing):
         for var in variables:
             mask = (df['variable_name'] == var)
             unique_values = len([v for v in df[mask]['value'].explode().unique() if v != '##N/A##'])
-            entropy_df = df[mask].groupby('responsible')['value'].apply(calculate_list_entropy,
+            entropy_df = df[mask].groupby('responsible', observed=True)['value'].apply(calculate_list_entropy,
                                                                         unique_values=unique_values,
                                                                         min_record_sample=5)
             entropy_df = entropy_df.reset_index()
@@ -391,14 +394,15 @@ class ItemFeatureProcessing(FeatureProcessing):
                 median_value = entropy_df['value'].median()
                 entropy_df[score_name] = entropy_df['value'].apply(
                     lambda x: 1 if x < median_value - 50 / 100 * median_value else 0)
-                df.loc[mask, score_name] = df[mask]['responsible'].map(entropy_df.set_index('responsible')[score_name])
+                df.loc[mask, score_name] = map_categorical_column(
+                    df.loc[mask, 'responsible'], entropy_df.set_index('responsible')[score_name])
 
         return df
 
     def make_score__first_digit(self):
         feature_name = 'f__numeric_response'
         score_name = 's__first_digit'
-        df = self.df_item[~pd.isnull(self.df_item[feature_name])].copy()
+        df = self._df_item[~pd.isnull(self._df_item[feature_name])].copy()
         # Select only those variables that have at least three distinct values and more than one hundred records
         valid_variables = self.filter_variable_name_by_frequency(df, feature_name, frequency=100, min_unique_values=3)
 
@@ -432,7 +436,8 @@ class ItemFeatureProcessing(FeatureProcessing):
 
 
                 mask = (df['variable_name'] == var)
-                df.loc[mask, score_name] = df[mask]['responsible'].map(bj_df.set_index('responsible')[score_name])
+                df.loc[mask, score_name] = map_categorical_column(
+                    df.loc[mask, 'responsible'], bj_df.set_index('responsible')[score_name])
         return df
 
     # def make_score__last_digit(self):
@@ -32,19 +32,15 @@ class UnitDataProcessing(ItemFeatureProcessing):
     def __init__(self, config):
         super().__init__(config)
         self._score_columns = None
+        # Item level scores computed beforehand, see prepare_score_node
+        self._item_scores = {}
 
     @property
     def df_unit_score(self):
-        for method_name in self.get_make_methods(method_type='score', level='unit'):
-            feature_name = method_name.replace('make_score_unit__', 'f__')
-            score_name = self.rename_feature(feature_name)
-            if feature_name in self._allowed_features and self._score_columns is None:
-                try:
-                    print('Processing Score {}...'.format(score_name))
-                    getattr(self, method_name)(feature_name)
-                    # print('Score{} Processed'.format(feature_name))
-                except Exception as e:
-                    print("WARNING: SCORE: {} won't be used in further calculation".format(score_name))
+        if self._score_columns is None:
+            # Resolve the item features once, the item level scores read _df_item, possibly from several threads
+            self.run_feature_graph('item')
+            self.run_feature_graph('score', prepare_node=self.prepare_score_node)
 
         score_columns = [col for col in self._df_unit if
                          col.startswith('s__')]  # and col.replace('s__','f__') in  self._allowed_features]
@@ -52,6 +48,26 @@ class UnitDataProcessing(ItemFeatureProcessing):
         self._score_columns = self._df_unit[score_columns].columns[self._df_unit[score_columns].nunique() > 1].tolist()
         return self._df_unit[['interview__id', 'responsible', 'survey_name', 'survey_version', ] + self._score_columns]
 
+    def prepare_score_node(self, method_name):
+        # The item level scores only read df_item and return a new frame, they can be computed concurrently
+        # before the unit scores, which write df_unit and df_resp, are run one at a time
+        name = method_name.replace('make_score_unit__', '')
+        if hasattr(self, 'make_score__' + name):
+            try:
+                self._item_scores[name] = getattr(self, 'make_score__' + name)()
+            except Exception as e:
+                # Kept to be raised by get_item_score, so that the unit score reports it without computing it again
+                self._item_scores[name] = e
+
+    def get_item_score(self, name):
+        # Item level score of a feature, unless it has already been computed by prepare_score_node
+        if name in self._item_scores:
+            item_score = self._item_scores.pop(name)
+            if isinstance(item_score, Exception):
+                raise item_score
+            return item_score
+        return getattr(self, 'make_score__' + name)()
+
     def make_global_score(self, combine_resp_score=True, restricted_columns=None):
         self._df_unit['unit_risk_score'] = 0
         scaler = StandardScaler()
@@ -111,7 +127,7 @@ class UnitDataProcessing(ItemFeatureProcessing):
             return
 
         self._df_resp = (
-            self._df_resp.groupby('responsible', as_index=False)[cols].mean()
+            self._df_resp.groupby('responsible', as_index=False, observed=True)[cols].mean()
         )
 
         X = self._df_resp[cols].copy()
@@ -133,7 +149,7 @@ class UnitDataProcessing(ItemFeatureProcessing):
             self._df_resp['responsible_score'] = normalize(col, norm='l1', axis=0).ravel()
 
     def save(self):
-        df = self._df_unit[['interview__id', 'responsible', 'unit_risk_score']]  # .copy()
+        df = decode_categorical_columns(self._df_unit[['interview__id', 'responsible', 'unit_risk_score']])
         df['unit_risk_score'] = df['unit_risk_score'].round(2)
         df.sort_values('unit_risk_score', inplace=True)
         #file_name = "_".join([self.config.surveys[0], self.config.survey_version[0], 'unit_risk_score']) + ".csv"
@@ -150,6 +166,7 @@ class UnitDataProcessing(ItemFeatureProcessing):
                                             on='responsible')
 
             merged_df = merged_df[['interview__id', 'responsible', 'survey_name', 'survey_version'] + sorted_columns]
+            merged_df = decode_categorical_columns(merged_df)
             output_path = self.config['output_file'].split('.')[0] + '_feature_score.csv'
             merged_df.to_csv(output_path, index=False)
             print(f'You can find the unit feature score file in {output_path}')
@@ -163,57 +180,57 @@ class UnitDataProcessing(ItemFeatureProcessing):
     def make_score_unit__single_question(self, feature_name):
         score_name = self.rename_feature(feature_name)
         # single_question is calculated at responsible level
-        data = self.make_score__single_question()
-        data = data.groupby(['responsible', 'variable_name']).agg({score_name: 'mean'})
+        data = self.get_item_score('single_question')
+        data = data.groupby(['responsible', 'variable_name'], observed=True).agg({score_name: 'mean'})
         data = data.reset_index()
-        data = data.groupby('responsible').agg({score_name: 'mean'})
-        self._df_resp[score_name] = self._df_resp['responsible'].map(data[score_name])
+        data = data.groupby('responsible', observed=True).agg({score_name: 'mean'})
+        self._df_resp[score_name] = map_categorical_column(self._df_resp['responsible'], data[score_name])
         # Fill with 0's for missing values
         self._df_resp[score_name].fillna(0, inplace=True)
 
     def make_score_unit__multi_option_question(self, feature_name):
         score_name = self.rename_feature(feature_name)
         # multi_option_question is calculated at responsible level
-        data = self.make_score__multi_option_question()
-        data = data.groupby(['responsible', 'variable_name']).agg({score_name: 'mean'})
+        data = self.get_item_score('multi_option_question')
+        data = data.groupby(['responsible', 'variable_name'], observed=True).agg({score_name: 'mean'})
         data = data.reset_index()
-        data = data.groupby('responsible').agg({score_name: 'mean'})
-        self._df_resp[score_name] = self._df_resp['responsible'].map(data[score_name])
+        data = data.groupby('responsible', observed=True).agg({score_name: 'mean'})
+        self._df_resp[score_name] = map_categorical_column(self._df_resp['responsible'], data[score_name])
         # Fill with 0's for missing values
         self._df_resp[score_name].fillna(0, inplace=True)
 
     def make_score_unit__answer_hour_set(self, feature_name):
-        data = self.make_score__answer_hour_set()
+        data = self.get_item_score('answer_hour_set')
         score_name = self.rename_feature(feature_name)
         # Get the ratio of anomalies per interview__id over the total number of answer set
-        data = data.groupby(['interview__id']).agg({score_name: 'mean'})
-        self._df_unit[score_name] = self._df_unit['interview__id'].map(data[score_name])
+        data = data.groupby(['interview__id'], observed=True).agg({score_name: 'mean'})
+        self._df_unit[score_name] = map_categorical_column(self._df_unit['interview__id'], data[score_name])
 
     def make_score_unit__answer_removed(self, feature_name):
-        data = self.make_score__answer_removed()
+        data = self.get_item_score('answer_removed')
         score_name = self.rename_feature(feature_name)
-        data = data.groupby(['interview__id']).agg({score_name: 'mean'})
-        self._df_unit[score_name] = self._df_unit['interview__id'].map(data[score_name])
+        data = data.groupby(['interview__id'], observed=True).agg({score_name: 'mean'})
+        self._df_unit[score_name] = map_categorical_column(self._df_unit['interview__id'], data[score_name])
         # Fill with 0's for missing values
         self._df_unit[score_name].fillna(0, inplace=True)
 
     def make_score_unit__answer_changed(self, feature_name):
-        data = self.make_score__answer_changed()
+        data = self.get_item_score('answer_changed')
         score_name = self.rename_feature(feature_name)
         # take the max number of anomaly for each question, i.e. 'roster_level' + 'variable_name'
-        data = data.groupby(['interview__id']).agg({score_name: 'mean'})
-        self._df_unit[score_name] = self._df_unit['interview__id'].map(data[score_name])
+        data = data.groupby(['interview__id'], observed=True).agg({score_name: 'mean'})
+        self._df_unit[score_name] = map_categorical_column(self._df_unit['interview__id'], data[score_name])
         # Fill with 0's for missing values
         self._df_unit[score_name].fillna(0, inplace=True)
 
     def make_score_unit__answer_position(self, feature_name):
         score_name = self.rename_feature(feature_name)
         # answer_position is calculated at responsible level
-        data = self.make_score__answer_position()
-        data = data.groupby(['responsible', 'variable_name']).agg({score_name: 'mean'})
+        data = self.get_item_score('answer_position')
+        data = data.groupby(['responsible', 'variable_name'], observed=True).agg({score_name: 'mean'})
         data = data.reset_index()
-        data = data.groupby('responsible')[score_name].mean()
-        self._df_resp[score_name] = self._df_resp['responsible'].map(data)
+        data = data.groupby('responsible', observed=True)[score_name].mean()
+        self._df_resp[score_name] = map_categorical_column(self._df_resp['responsible'], data)
         # Fill with 0's for missing values
         self._df_resp[score_name].fillna(0, inplace=True)
 
@@ -221,11 +238,13 @@ class UnitDataProcessing(ItemFeatureProcessing):
         score_name = self.rename_feature(feature_name)
         score_name1 = score_name + '_lower'
         score_name2 = score_name + '_upper'
-        data = self.make_score__answer_selected()
-        data = data.groupby(['interview__id']).agg({score_name1: 'mean', score_name2: 'mean'})
+        data = self.get_item_score('answer_selected')
+        data = data.groupby(['interview__id'], observed=True).agg({score_name1: 'mean', score_name2: 'mean'})
         data = data.reset_index()
-        self._df_unit[score_name1] = self._df_unit['interview__id'].map(data.set_index('interview__id')[score_name1])
-        self._df_unit[score_name2] = self._df_unit['interview__id'].map(data.set_index('interview__id')[score_name2])
+        self._df_unit[score_name1] = map_categorical_column(self._df_unit['interview__id'],
+                                                            data.set_index('interview__id')[score_name1])
+        self._df_unit[score_name2] = map_categorical_column(self._df_unit['interview__id'],
+                                                            data.set_index('interview__id')[score_name2])
         # Fill with 0's for missing values
         self._df_unit[score_name1].fillna(0, inplace=True)
         self._df_unit[score_name2].fillna(0, inplace=True)
@@ -234,39 +253,42 @@ class UnitDataProcessing(ItemFeatureProcessing):
         score_name = self.rename_feature(feature_name)
         score_name1 = score_name + '_lower'
         score_name2 = score_name + '_upper'
-        data = self.make_score__answer_duration()
-        data = data.groupby(['interview__id']).agg({score_name1: 'mean', score_name2: 'mean'})
+        data = self.get_item_score('answer_duration')
+        data = data.groupby(['interview__id'], observed=True).agg({score_name1: 'mean', score_name2: 'mean'})
         data = data.reset_index()
-        self._df_unit[score_name1] = self._df_unit['interview__id'].map(data.set_index('interview__id')[score_name1])
-        self._df_unit[score_name2] = self._df_unit['interview__id'].map(data.set_index('interview__id')[score_name2])
+        self._df_unit[score_name1] = map_categorical_column(self._df_unit['interview__id'],
+                                                            data.set_index('interview__id')[score_name1])
+        self._df_unit[score_name2] = map_categorical_column(self._df_unit['interview__id'],
+                                                            data.set_index('interview__id')[score_name2])
         # Fill with 0's for missing values
         self._df_unit[score_name1].fillna(0, inplace=True)
         self._df_unit[score_name2].fillna(0, inplace=True)
 
     def make_score_unit__first_decimal(self, feature_name):
         score_name = self.rename_feature(feature_name)
-        data = self.make_score__first_decimal()
-        data = data.groupby(['interview__id']).agg({score_name: 'mean'})
+        data = self.get_item_score('first_decimal')
+        data = data.groupby(['interview__id'], observed=True).agg({score_name: 'mean'})
 
-        self._df_unit[score_name] = self._df_unit['interview__id'].map(data[score_name])
+        self._df_unit[score_name] = map_categorical_column(self._df_unit['interview__id'], data[score_name])
         # Fill with 0's for missing values. It means "No anomalies detected"
         self._df_unit[score_name].fillna(0, inplace=True)
 
+    @feature_node(inputs=['f__numeric_response'])
     def make_score_unit__first_digit(self, feature_name):
         score_name = self.rename_feature(feature_name)
-        data = self.make_score__first_digit()
-        data = data.groupby(['responsible']).agg({score_name: 'mean'})
+        data = self.get_item_score('first_digit')
+        data = data.groupby(['responsible'], observed=True).agg({score_name: 'mean'})
 
-        self._df_resp[score_name] = self._df_resp['responsible'].map(data[score_name])
+        self._df_resp[score_name] = map_categorical_column(self._df_resp['responsible'], data[score_name])
         # Fill with 0's for missing values
         self._df_resp[score_name].fillna(0, inplace=True)
 
     def make_score_unit__sequence_jump(self, feature_name):
         score_name = feature_name.replace('f__', 's__')
-        data = self.make_score__sequence_jump()
-        data = data.groupby(['interview__id']).agg({score_name: 'mean'})
+        data = self.get_item_score('sequence_jump')
+        data = data.groupby(['interview__id'], observed=True).agg({score_name: 'mean'})
 
-        self._df_unit[score_name] = self._df_unit['interview__id'].map(data[score_name])
+        self._df_unit[score_name] = map_categorical_column(self._df_unit['interview__id'], data[score_name])
         # Fill with 0's for missing values. It means "No anomalies detected"
         self._df_unit[score_name].fillna(0, inplace=True)
 
@@ -286,32 +308,35 @@ class UnitDataProcessing(ItemFeatureProcessing):
 
     def make_score_unit__total_elapse(self, feature_name):
         score_name = self.rename_feature(feature_name)
-        self._df_unit[feature_name] = round(self._df_unit[feature_name] / 300)
+        # round to 5 min, in a copy as f__total_elapse is also read by the pause_duration score
+        data = round(self._df_unit[[feature_name]] / 300)
         contamination = self.get_contamination_parameter(feature_name, method='medfilt', random_state=42)
 
         model = ECOD(contamination=contamination)
-        model.fit(self._df_unit[[feature_name]])
-        self._df_unit[score_name] = model.predict(self._df_unit[[feature_name]])
+        model.fit(data)
+        self._df_unit[score_name] = model.predict(data)
 
         score_name1 = score_name + '_lower'
         score_name2 = score_name + '_upper'
-        min_good_value = self._df_unit[(self._df_unit[score_name] == 0)][feature_name].min()
-        max_good_value = self._df_unit[(self._df_unit[score_name] == 0)][feature_name].max()
+        min_good_value = data[(self._df_unit[score_name] == 0)][feature_name].min()
+        max_good_value = data[(self._df_unit[score_name] == 0)][feature_name].max()
 
         self._df_unit[score_name1] = 0
         self._df_unit[score_name2] = 0
 
-        self._df_unit.loc[(self._df_unit[feature_name] < min_good_value), score_name1] = 1
-        self._df_unit.loc[(self._df_unit[feature_name] > max_good_value), score_name2] = 1
+        self._df_unit.loc[(data[feature_name] < min_good_value), score_name1] = 1
+        self._df_unit.loc[(data[feature_name] > max_good_value), score_name2] = 1
 
         self._df_unit.drop(columns=[score_name], inplace=True)
 
+    @feature_node(inputs=['f__total_elapse'])
     def make_score_unit__pause_duration(self, feature_name):
 
         score_name = self.rename_feature(feature_name)
         # transform Total duration into 10 minutes values
         self._df_unit[score_name] = self._df_unit[feature_name] / self._df_unit['f__total_elapse']
 
+    @feature_node(inputs=['f__number_answered'])
     def make_score_unit__pause_count(self, feature_name):
         score_name = self.rename_feature(feature_name)
         pause_mask = ~pd.isnull(self._df_unit[feature_name])
@@ -325,27 +350,28 @@ class UnitDataProcessing(ItemFeatureProcessing):
         score_name = self.rename_feature(feature_name)
         self._df_unit[score_name] = self._df_unit[feature_name]
 
+    @feature_node(inputs=['f__gps_latitude', 'f__gps_longitude', 'f__gps_accuracy'])
     def make_score_unit__gps(self, feature_name):
-        data = self.make_score__gps()
+        data = self.get_item_score('gps')
         features = ['s__gps_proximity_counts', 's__gps_outlier', 's__gps_extreme_outlier']
 
-        data = data.groupby('interview__id')[features].sum()
+        data = data.groupby('interview__id', observed=True)[features].sum()
         data = data.reset_index()
 
-        self._df_unit['s__gps_proximity_counts'] = self._df_unit['interview__id'].map(
+        self._df_unit['s__gps_proximity_counts'] = map_categorical_column(self._df_unit['interview__id'],
             data.set_index('interview__id')['s__gps_proximity_counts']
         )
 
-        self._df_unit['s__gps_outlier'] = self._df_unit['interview__id'].map(
+        self._df_unit['s__gps_outlier'] = map_categorical_column(self._df_unit['interview__id'],
             data.set_index('interview__id')['s__gps_outlier']
         )
-        self._df_unit['s__gps_extreme_outlier'] = self._df_unit['interview__id'].map(
+        self._df_unit['s__gps_extreme_outlier'] = map_categorical_column(self._df_unit['interview__id'],
             data.set_index('interview__id')['s__gps_extreme_outlier']
         )
 
-        data = self.df_item.groupby('interview__id')[feature_name].sum()
+        data = self.df_item.groupby('interview__id', observed=True)[feature_name].sum()
         score_name = feature_name.replace('f__', 's__')
-        self._df_unit[score_name] = self._df_unit['interview__id'].map(data)
+        self._df_unit[score_name] = map_categorical_column(self._df_unit['interview__id'], data)
 
         self._df_unit['s__gps_proximity_counts'].fillna(0, inplace=True)
         self._df_unit['s__gps_outlier'].fillna(0, inplace=True)
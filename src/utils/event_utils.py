@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+
+# numba is optional, the event streams are scanned with NumPy when it is not installed
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+NUMBA_AVAILABLE = njit is not None
+
+
+def get_group_offsets(keys):
+    """
+    This function returns the row offsets of the groups of a sorted key column, i.e. the position of the first row of
+    each group followed by the number of rows.
+
+    Parameters:
+    keys (pd.Series): The key column, e.g. interview__id, with the rows of each group contiguous.
+
+    Returns:
+    offsets (np.ndarray): The offsets, the rows of group g are offsets[g]:offsets[g + 1].
+    """
+    codes = pd.factorize(keys)[0]
+    starts = np.flatnonzero(codes[1:] != codes[:-1]) + 1
+    return np.concatenate(([0], starts, [len(codes)])).astype('int64') if len(codes) else np.zeros(1, dtype='int64')
+
+
+def _scan_event_stream_numpy(offsets, values, valid):
+    n = len(values)
+    first = offsets[:-1]
+    previous = np.arange(n, dtype='int64') - 1
+    previous[first] = -1
+    has_difference = np.zeros(n, dtype=bool)
+    has_difference[1:] = valid[1:] & valid[:-1]
+    has_difference[first] = False
+    difference = np.zeros(n, dtype='int64')
+    difference[has_difference] = values[1:][has_difference[1:]] - values[:-1][has_difference[1:]]
+    return previous, difference, has_difference
+
+
+def _scan_event_stream_loop(offsets, values, valid):
+    n = len(values)
+    previous = np.empty(n, dtype=np.int64)
+    difference = np.zeros(n, dtype=np.int64)
+    has_difference = np.zeros(n, dtype=np.bool_)
+    for group in range(len(offsets) - 1):
+        start, end = offsets[group], offsets[group + 1]
+        if start < end:
+            previous[start] = -1
+        for row in range(start + 1, end):
+            previous[row] = row - 1
+            if valid[row] and valid[row - 1]:
+                difference[row] = values[row] - values[row - 1]
+                has_difference[row] = True
+    return previous, difference, has_difference
+
+
+_scan_event_stream_numba = njit(cache=True, nogil=True)(_scan_event_stream_loop) if NUMBA_AVAILABLE else None
+
+
+def scan_event_stream(offsets, values, valid, use_numba=True):
+    """
+    This function scans the events of each group once, returning the position of the previous event and the
+    difference of an integer column to the previous event, as a groupby shift and diff would.
+
+    Parameters:
+    offsets (np.ndarray): The row offsets of the groups, see get_group_offsets.
+    values (np.ndarray): The int64 column to difference, e.g. timestamps in nanoseconds.
+    valid (np.ndarray): Boolean mask of the non-missing values.
+    use_numba (bool): Whether to use the numba compiled scan, if numba is installed.
+
+    Returns:
+    previous (np.ndarray): The position of the previous event in the group, -1 for the first event.
+    difference (np.ndarray): The difference to the previous event, 0 where there is none.
+    has_difference (np.ndarray): Boolean mask of the events with a difference, i.e. not first in their group and
+    with both values valid.
+    """
+    values = np.ascontiguousarray(values, dtype='int64')
+    valid = np.ascontiguousarray(valid, dtype=bool)
+    if use_numba and NUMBA_AVAILABLE:
+        return _scan_event_stream_numba(offsets, values, valid)
+    return _scan_event_stream_numpy(offsets, values, valid)
+
+
+def take_previous(series, previous, fill_value):
+    """
+    Returns the values of the previous events of a series, fill_value for the first events.
+    """
+    return pd.Series(series.array.take(previous, allow_fill=True, fill_value=fill_value), index=series.index,
+                     name=series.name)
@@ -0,0 +1,152 @@
+import io
+import os
+import zipfile
+
+QUESTIONNAIRE_ZIP = 'Questionnaire/content.zip'
+QUESTIONNAIRE_DIR = 'Questionnaire/content'
+
+
+class DirectorySource:
+    """
+    This class gives access to the files of a survey version extracted in a directory.
+
+    Attributes:
+    path: The directory path where the survey files are located.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def list_files(self, folder=''):
+        """
+        Returns the names of the files in folder, relative to folder.
+        """
+        folder_path = os.path.join(self.path, folder)
+        if not os.path.isdir(folder_path):
+            return []
+        return [f for f in os.listdir(folder_path) if os.path.isfile(os.path.join(folder_path, f))]
+
+    def exists(self, file_name):
+        return os.path.exists(os.path.join(self.path, file_name))
+
+    def open(self, file_name):
+        return open(os.path.join(self.path, file_name), 'rb')
+
+
+class ZipSource:
+    """
+    This class gives access to the members of the Paradata and Tabular export files of a survey version, without
+    extracting them. Members of the nested Questionnaire/content.zip are exposed under Questionnaire/content/,
+    i.e. the same paths they would have once extracted.
+
+    Attributes:
+    members: A dictionary that maps each member name to the zip file containing it.
+    """
+
+    def __init__(self, zip_paths):
+        """
+        The constructor for the ZipSource class.
+
+        Parameters:
+        zip_paths: The list of export zip files of the survey version.
+        """
+        self.members = {}
+        self._content = None
+        for zip_path in zip_paths:
+            with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+                for name in zip_ref.namelist():
+                    if not name.endswith('/'):
+                        self.members.setdefault(name, zip_path)
+
+    @property
+    def content(self):
+        """
+        The nested questionnaire archive, held in memory as it is only a few kilobytes large.
+        """
+        if self._content is None:
+            with self._open_member(QUESTIONNAIRE_ZIP) as file:
+                self._content = zipfile.ZipFile(io.BytesIO(file.read()), 'r')
+        return self._content
+
+    def _open_member(self, file_name):
+        if file_name not in self.members:
+            raise FileNotFoundError(f"ERROR: {file_name} not found in the export files.")
+        # Use a new ZipFile for each member, the opened member keeps the archive open until it is closed
+        return zipfile.ZipFile(self.members[file_name], 'r').open(file_name)
+
+    def _names(self):
+        names = list(self.members)
+        if QUESTIONNAIRE_ZIP in self.members:
+            names += [f'{QUESTIONNAIRE_DIR}/{name}' for name in self.content.namelist() if not name.endswith('/')]
+        return names
+
+    def list_files(self, folder=''):
+        """
+        Returns the names of the members in folder, relative to folder.
+        """
+        prefix = folder.rstrip('/') + '/' if folder else ''
+        return [name[len(prefix):] for name in self._names()
+                if name.startswith(prefix) and '/' not in name[len(prefix):]]
+
+    def exists(self, file_name):
+        return file_name in self._names()
+
+    def open(self, file_name):
+        if file_name.startswith(QUESTIONNAIRE_DIR + '/') and QUESTIONNAIRE_ZIP in self.members:
+            return self.content.open(file_name[len(QUESTIONNAIRE_DIR) + 1:])
+        return self._open_member(file_name)
+
+
+def get_source(survey_path):
+    """
+    This function returns the source of the survey files.
+
+    Parameters:
+    survey_path (str or source): Either the directory path where the survey files are located or a source object.
+
+    Returns:
+    source: A DirectorySource if survey_path is a directory path, survey_path otherwise.
+    """
+    if isinstance(survey_path, (str, os.PathLike)):
+        return DirectorySource(survey_path)
+    return survey_path
+
+
+def get_export_fingerprint(zip_paths):
+    """
+    This function fingerprints the export files of a survey version with the size of each zip file and the CRC of
+    its members, as recorded in the zip central directory. Reading the central directory does not decompress
+    anything, so the fingerprint is cheap to compute even for large exports.
+
+    The modification time is not part of the fingerprint, an export downloaded again without changes keeps the
+    same fingerprint.
+
+    Parameters:
+    zip_paths (list): The list of export zip files of the survey version.
+
+    Returns:
+    dict: A JSON serializable dictionary mapping each zip file name to its size and the CRC of its members.
+    """
+    fingerprint = {}
+    for zip_path in sorted(zip_paths):
+        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+            members = {info.filename: info.CRC for info in zip_ref.infolist() if not info.is_dir()}
+        fingerprint[os.path.basename(zip_path)] = {'size': os.path.getsize(zip_path), 'members': members}
+    return fingerprint
+
+
+def get_member_crc(fingerprint, member):
+    """
+    This function returns the CRC of a member of the export files, as stored in a fingerprint.
+
+    Parameters:
+    fingerprint (dict): The fingerprint returned by get_export_fingerprint.
+    member (str): The name of the member, e.g. Questionnaire/content.zip.
+
+    Returns:
+    int: The CRC of the member, None if the member is not in the fingerprint.
+    """
+    for zip_fingerprint in (fingerprint or {}).values():
+        if member in zip_fingerprint['members']:
+            return zip_fingerprint['members'][member]
+    return None
@@ -0,0 +1,145 @@
+import inspect
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# Prefixes of the methods computing the features and scores, mapped to their kind and to the prefix of the column
+# they produce
+NODE_PREFIXES = {
+    'make_feature_item__': ('item', 'f__'),
+    'make_feature_unit__': ('unit', 'f__'),
+    'make_score_unit__': ('score', 's__'),
+}
+
+
+def feature_node(inputs=(), outputs=()):
+    """
+    This decorator declares the columns read and written by a feature or score method, in addition to the default
+    ones: a method named make_feature_<level>__<name> writes f__<name>, and a method named make_score_unit__<name>
+    reads f__<name> and writes s__<name>.
+
+    Parameters:
+    inputs (list): The additional columns read by the method.
+    outputs (list): The additional columns written by the method.
+
+    Returns:
+    decorator: The decorator storing the columns on the method.
+    """
+
+    def decorator(method):
+        method.node_inputs = list(inputs)
+        method.node_outputs = list(outputs)
+        return method
+
+    return decorator
+
+
+def get_feature_nodes(cls):
+    """
+    This function collects the feature and score methods of a class, with the columns they read and write.
+
+    Parameters:
+    cls (type): The class defining the methods.
+
+    Returns:
+    nodes (dict): A dictionary mapping each method name to its kind ('item', 'unit' or 'score'), the name of its
+    feature in the configuration file (f__<name>), and the sets of its inputs and outputs columns.
+    """
+    nodes = {}
+    for method_name, method in inspect.getmembers(cls, inspect.isfunction):
+        prefix = next((prefix for prefix in NODE_PREFIXES if method_name.startswith(prefix)), None)
+        if prefix is None:
+            continue
+        kind, column_prefix = NODE_PREFIXES[prefix]
+        name = method_name[len(prefix):]
+        inputs = set(getattr(method, 'node_inputs', []))
+        if kind == 'score':
+            inputs.add('f__' + name)
+        outputs = {column_prefix + name} | set(getattr(method, 'node_outputs', []))
+        nodes[method_name] = {'kind': kind, 'feature': 'f__' + name, 'inputs': inputs, 'outputs': outputs}
+    return nodes
+
+
+class FeatureGraph:
+    """
+    This class schedules the feature and score methods as a directed acyclic graph, where a method depends on the
+    methods writing the columns it reads. Columns written by no method, e.g. those built with the item and unit
+    frames, create no dependency.
+
+    Attributes:
+    nodes: The methods, as returned by get_feature_nodes.
+    producers: A dictionary mapping each column to the method writing it.
+    done: The methods already run.
+
+    Methods:
+    get_dependencies(name): Returns the methods a method depends on.
+    get_required(targets): Returns the methods needed to compute the targets.
+    get_levels(names): Splits the methods in levels of independent methods.
+    run(targets, run_node, workers, prepare_node): Runs the methods needed by the targets, in dependency order.
+    """
+
+    def __init__(self, nodes):
+        """
+        The constructor for the FeatureGraph class.
+
+        Parameters:
+        nodes: The methods, as returned by get_feature_nodes.
+        """
+        self.nodes = nodes
+        self.producers = {}
+        for name in sorted(nodes):
+            for column in nodes[name]['outputs']:
+                self.producers.setdefault(column, name)
+        self.done = set()
+
+    def get_dependencies(self, name):
+        """
+        Returns the methods writing the columns read by the method name.
+        """
+        return {self.producers[column] for column in self.nodes[name]['inputs'] if column in self.producers} - {name}
+
+    def get_required(self, targets):
+        """
+        Returns the targets and all the methods they depend on, directly or not.
+        """
+        required = set()
+        pending = list(targets)
+        while pending:
+            name = pending.pop()
+            if name not in required:
+                required.add(name)
+                pending.extend(self.get_dependencies(name))
+        return required
+
+    def get_levels(self, names):
+        """
+        Splits the methods in levels, the methods of a level only depend on the methods of the previous levels.
+        Methods are sorted by name within a level, so that the order of execution is deterministic.
+        """
+        remaining = set(names)
+        levels = []
+        while remaining:
+            level = sorted(name for name in remaining if not self.get_dependencies(name) & remaining)
+            if not level:
+                raise ValueError(f"ERROR: circular dependency between {sorted(remaining)}")
+            levels.append(level)
+            remaining -= set(level)
+        return levels
+
+    def run(self, targets, run_node, workers=1, prepare_node=None):
+        """
+        Runs the methods needed by the targets that are not already done, in dependency order.
+
+        Parameters:
+        targets: The methods whose outputs are needed.
+        run_node: The function running a method, given its name.
+        workers: The number of threads running prepare_node on the methods of a level, None to use all the cores.
+        prepare_node: Optional function computing the part of a method that does not write shared state, given its
+        name. It is run concurrently on the methods of a level, before run_node is called on each of them in turn.
+        """
+        for level in self.get_levels(self.get_required(targets) - self.done):
+            if prepare_node is not None and workers != 1 and len(level) > 1:
+                with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+                    list(executor.map(prepare_node, level))
+            for name in level:
+                run_node(name)
+                self.done.add(name)
@@ -0,0 +1,45 @@
+import pandas as pd
+
+from src.import_manager import get_paradata
+
+PARADATA_HEADER = ['interview__id', 'order', 'event', 'responsible', 'role', 'timestamp_utc', 'tz_offset',
+                   'parameters']
+
+
+def write_paradata(directory, events):
+    lines = ['\t'.join(PARADATA_HEADER)] + ['\t'.join(str(value) for value in event) for event in events]
+    (directory / 'paradata.tab').write_text('\n'.join(lines) + '\n', encoding='utf8')
+    return str(directory)
+
+
+def test_chunksize_does_not_change_the_parsed_paradata(tmp_path):
+    # The last chunk with chunksize=3 only holds the parameterless Completed event
+    survey_path = write_paradata(tmp_path, [
+        ['i1', 1, 'InterviewCreated', 'int1', 1, '2023-01-01T10:00:00', '01:00', ''],
+        ['i1', 2, 'AnswerSet', 'int1', 1, '2023-01-01T10:01:00', '01:00', 'q1||5||'],
+        ['i1', 3, 'AnswerSet', 'int1', 1, '2023-01-01T10:02:00', '01:00', 'q2||a||1'],
+        ['i1', 4, 'Completed', 'int1', 1, '2023-01-01T10:03:00', '01:00', ''],
+    ])
+    df_default = get_paradata(survey_path, pd.DataFrame(), 'survey', 'survey_1')
+    for chunksize in [1, 3]:
+        df_chunked = get_paradata(survey_path, pd.DataFrame(), 'survey', 'survey_1', chunksize=chunksize)
+        pd.testing.assert_frame_equal(df_chunked, df_default)
+    assert df_default['param'].tolist()[1:3] == ['q1', 'q2']
+    assert df_default['roster_level'].tolist()[1:3] == ['', '1']
+
+
+def test_chunks_emptied_by_the_interviewing_filter(tmp_path):
+    # With chunksize=2, the second chunk only holds supervisor events, removed by the filter, and the third one
+    # only a parameterless interviewer event
+    survey_path = write_paradata(tmp_path, [
+        ['i1', 1, 'InterviewCreated', 'int1', 1, '2023-01-01T10:00:00', '01:00', ''],
+        ['i1', 2, 'AnswerSet', 'int1', 1, '2023-01-01T10:01:00', '01:00', 'q1||5||'],
+        ['i2', 1, 'InterviewCreated', 'sup1', 2, '2023-01-01T11:00:00', '01:00', ''],
+        ['i2', 2, 'AnswerSet', 'sup1', 2, '2023-01-01T11:01:00', '01:00', 'q1||3||'],
+        ['i1', 3, 'Completed', 'int1', 1, '2023-01-01T10:03:00', '01:00', ''],
+    ])
+    df_default = get_paradata(survey_path, pd.DataFrame(), 'survey', 'survey_1', interviewing_only=True)
+    df_chunked = get_paradata(survey_path, pd.DataFrame(), 'survey', 'survey_1', chunksize=2,
+                              interviewing_only=True)
+    pd.testing.assert_frame_equal(df_chunked, df_default)
+    assert df_chunked[['interview__id', 'order']].values.tolist() == [['i1', 1], ['i1', 2], ['i1', 3]]